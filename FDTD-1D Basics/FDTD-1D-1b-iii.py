@@ -47,16 +47,16 @@ with writer.saving(fig, 'Gifs/FDTD-1D-1b-iii.gif', 100):
     for n in range(n_max):
 
         # Update electric field
-        for k in range(1, k_max):
-            Ex[k] = Ex[k] + 0.25*(Hz[k] - Hz[k-1])
+        # Vector notation to speed up computation time
+        Ex[1:] = Ex[1:] + 0.25*(Hz[1:] - Hz[:k_max-1])
 
         # Electric field source
         pulse           = Source_Function(n)
         Ex[k_source]    = pulse
 
         # Update magnetic field
-        for k in range(k_max-1):
-            Hz[k] = Hz[k] + 0.25*(Ex[k+1] - Ex[k])
+        # Vector notation to speed up computation time
+        Hz[:k_max-1] = Hz[:k_max-1] + 0.25*(Ex[1:] - Ex[:k_max-1])
 
         # Plotting
         if n % 5 == 0: # Frame rate
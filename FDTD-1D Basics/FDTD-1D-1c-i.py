@@ -49,8 +49,8 @@ with writer.saving(fig, 'Gifs/FDTD-1D-1c-i.gif', 100):
     # Time loop
     for n in range(n_max):
         # Update electric field
-        for k in range(1, k_max):
-            Ex[k] = Ex[k] + 0.5*(Hz[k] - Hz[k-1])
+        # Vector notation to speed up computation time
+        Ex[1:] = Ex[1:] + 0.5*(Hz[1:] - Hz[:k_max-1])
 
         # Electric field source
         pulse           = Source_Function(n)
@@ -64,8 +64,8 @@ with writer.saving(fig, 'Gifs/FDTD-1D-1c-i.gif', 100):
             Ex[k_max-1] = Upper_Boundary[n-2]
         
         # Update magnetic field
-        for k in range(k_max-1):
-            Hz[k] = Hz[k] + 0.5*(Ex[k+1] - Ex[k])
+        # Vector notation to speed up computation time
+        Hz[:k_max-1] = Hz[:k_max-1] + 0.5*(Ex[1:] - Ex[:k_max-1])
 
         # Plotting
         if n % 5 == 0: # Frame rate
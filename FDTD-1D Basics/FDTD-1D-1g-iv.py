@@ -82,8 +82,8 @@ with writer.saving(fig, 'Gifs/FDTD-1D-1g-iv.gif', 100):
     for n in range(n_max):
         # Update electric field
         # Metallic wall will reflect, therefore update will be -Ex
-        for k in range(1, k_max):
-            Ex[k] = Ex[k] + 0.5*(Hz[k] - Hz[k-1])
+        # Vector notation to speed up computation time
+        Ex[1:] = Ex[1:] + 0.5*(Hz[1:] - Hz[:k_max-1])
 
         # Electric field soft-source
         pulse           = Source_Function(n, freq)
@@ -95,8 +95,7 @@ with writer.saving(fig, 'Gifs/FDTD-1D-1g-iv.gif', 100):
 
         # Metallic wall perfect electric conductor boundary
         # i.e. complete reflection
-        for l in range(int(k_max/2),int(k_max/2)+25):
-            Ex[l] = 0
+        Ex[int(k_max/2):int(k_max/2)+25] = 0
 
         # Boundaries at beginning and end of domain
         if n > 1:
@@ -104,8 +103,8 @@ with writer.saving(fig, 'Gifs/FDTD-1D-1g-iv.gif', 100):
             Ex[k_max-1] = Upper_Boundary[n-2]
         
         # Update magnetic field
-        for k in range(k_max-1):
-            Hz[k] = Hz[k] + 0.5*(Ex[k+1] - Ex[k])
+        # Vector notation to speed up computation time
+        Hz[:k_max-1] = Hz[:k_max-1] + 0.5*(Ex[1:] - Ex[:k_max-1])
 
         # Plotting
         if n % 5 == 0: # Frame rate
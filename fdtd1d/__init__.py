@@ -0,0 +1,29 @@
+# 1-D FDTD engine shared by the FDTD-1D Basics and Flux notation scenarios
+
+from .batch import Batch
+from .boundaries import CPML, PEC, PMC, AbsorbingBoundary, MurBoundary, PECMask, PECRegion, Periodic
+from .monitors import DFTMonitor
+from .scenarios import SCENARIOS, Scenario, scenario
+from .simulation import Simulation
+from .sources import GaussianPulse, ModulatedGaussian, SineWave, Source
+
+__all__ = [
+    'AbsorbingBoundary',
+    'Batch',
+    'CPML',
+    'DFTMonitor',
+    'GaussianPulse',
+    'ModulatedGaussian',
+    'MurBoundary',
+    'PEC',
+    'PECMask',
+    'PECRegion',
+    'PMC',
+    'Periodic',
+    'SCENARIOS',
+    'Scenario',
+    'Simulation',
+    'SineWave',
+    'Source',
+    'scenario',
+]
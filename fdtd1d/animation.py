@@ -0,0 +1,247 @@
+# GIF animations of the scenarios, drawn exactly like the scripts
+# This is the only module of fdtd1d that imports matplotlib
+#
+# Command line:
+#   python -m fdtd1d.animation 2-3 -o FDTD-1D-2-3.gif --background thread
+
+# Imports
+import argparse
+import multiprocessing
+import queue
+import threading
+from io import BytesIO
+
+import matplotlib
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+
+from .scenarios import SCENARIOS, scenario
+from .styles import style
+
+# Resolution and frame rate of the scripts' PillowWriter output
+DPI = 100
+FPS = 15
+
+
+def draw(fig, st, n, Ex, Hz=None, material=None):
+    """Draw one frame on an empty figure, with the scripts' plot calls."""
+    matplotlib.rcParams['font.size'] = 12
+    xticks = np.arange(0, st.xmax + 1, step=20)
+    if len(st.panels) == 2:
+        # Plot the E-field
+        ax = fig.add_subplot(211)
+        ax.plot(Ex, color='b', linewidth=1)
+        ax.set_ylabel('E$_x$', fontsize='14')
+        ax.set_xticks(xticks)
+        ax.set_xlim(0, st.xmax)
+        ax.set_yticks(np.arange(st.yticks[0], st.yticks[1], step=st.yticks[2]))
+        ax.set_ylim(*st.ylim)
+        ax.text(*st.time_text, 'T = {}'.format(n), horizontalalignment='center')
+
+        # Plot H-field
+        ax = fig.add_subplot(212)
+        ax.plot(Hz, color='r', linewidth=1)
+        ax.set_ylabel('H$_y$', fontsize='14')
+        ax.set_xlabel('FDTD cells')
+        ax.set_xticks(xticks)
+        ax.set_xlim(0, st.xmax)
+        ax.set_yticks(np.arange(st.yticks[0], st.yticks[1], step=st.yticks[2]))
+        ax.set_ylim(*st.ylim)
+        fig.subplots_adjust(bottom=0.2, hspace=0.45)
+        return
+
+    # Plot the E-field and material
+    ax = fig.add_subplot(111)
+    ax.plot(Ex, color='b', linewidth=1.5)
+    if material is not None:
+        ax.plot(material, color='k', linewidth=1.5, linestyle='--')
+    ax.set_xlabel('FDTD cells', fontsize='14')
+    ax.set_ylabel('E$_x$', fontsize='14')
+    ax.set_xticks(xticks)
+    ax.set_xlim(0, st.xmax)
+    ax.set_yticks(np.arange(st.yticks[0], st.yticks[1], step=st.yticks[2]))
+    ax.set_ylim(*st.ylim)
+    align = dict(horizontalalignment='center')
+    if st.centre:
+        align['verticalalignment'] = 'center'
+    ax.text(*st.time_text, 'T = {}'.format(n), **align)
+    for x, y, text in st.labels:
+        ax.text(x, y, text, **align)
+    fig.tight_layout()
+
+
+class ClassicRenderer:
+    """Rebuild the whole figure for every frame, as the scripts do."""
+
+    def __init__(self, st, material, k_max):
+        self.st       = st
+        self.material = material
+        self.fig      = Figure(figsize=st.figsize)
+
+    def frame(self, n, Ex, Hz=None):
+        draw(self.fig, self.st, n, Ex, Hz, self.material)
+        # Capture the plot (what PillowWriter.grab_frame does)
+        buf = BytesIO()
+        self.fig.savefig(buf, format='rgba', dpi=DPI)
+        w, h  = self.fig.get_size_inches()*DPI
+        image = Image.frombuffer('RGBA', (int(w), int(h)), buf.getbuffer(), 'raw', 'RGBA', 0, 1)
+        # Clear figure for next capture
+        self.fig.clf()
+        return image.convert('RGB')
+
+
+class PersistentRenderer:
+    """Build the figure once, then only redraw the field lines and time label.
+
+    Axes, ticks, labels and layout are rendered once into a background
+    that is restored for every frame. The lines, the spines that a full
+    draw puts over them and the 'T = n' label are then drawn on top in the
+    same order as a full draw, so each frame costs a few artist draws
+    instead of a figure layout.
+    """
+
+    def __init__(self, st, material, k_max):
+        self.fig    = Figure(figsize=st.figsize, dpi=DPI)
+        self.canvas = FigureCanvasAgg(self.fig)
+        zeros = np.zeros(k_max)
+        draw(self.fig, st, 0, zeros, zeros if len(st.panels) == 2 else None, material)
+
+        axes        = self.fig.axes
+        self.fields = [ax.lines[0] for ax in axes]
+        self.time   = axes[0].texts[0]
+        self.animated = []
+        for i, ax in enumerate(axes):
+            self.animated += [(ax, line) for line in ax.lines]
+            self.animated += [(ax, spine) for spine in ax.spines.values()]
+            if i == 0:
+                self.animated.append((ax, self.time))
+        for _, artist in self.animated:
+            artist.set_animated(True)
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+
+    def frame(self, n, Ex, Hz=None):
+        self.canvas.restore_region(self.background)
+        self.fields[0].set_ydata(Ex)
+        if Hz is not None:
+            self.fields[1].set_ydata(Hz)
+        self.time.set_text('T = {}'.format(n))
+        for ax, artist in self.animated:
+            ax.draw_artist(artist)
+        return Image.fromarray(np.asarray(self.canvas.buffer_rgba())).convert('RGB')
+
+
+def _save(images, path):
+    # Same GIF encoding as matplotlib's PillowWriter at 15 frames per second
+    images[0].save(path, save_all=True, append_images=images[1:], duration=int(1000/FPS), loop=0)
+
+
+def _render(frames, st, path, material, k_max, persistent):
+    # Consume (n, Ex, Hz) frames until None and encode them into path
+    renderer = (PersistentRenderer if persistent else ClassicRenderer)(st, material, k_max)
+    images   = []
+    while True:
+        frame = frames.get()
+        if frame is None:
+            break
+        images.append(renderer.frame(*frame))
+    _save(images, path)
+
+
+def _render_thread(frames, st, path, material, k_max, persistent, errors):
+    try:
+        _render(frames, st, path, material, k_max, persistent)
+    except BaseException as error:
+        errors.append(error)
+
+
+def save_gif(sc, path, background=None, persistent=True, queue_size=16, jit=None):
+    """Run Scenario sc and write its animation to path.
+
+    background=None draws every frame in the time loop, as the scripts
+    do. background='thread' or 'process' hands copies of the captured
+    fields to a rendering worker through a queue of queue_size frames, so
+    the simulation keeps stepping while frames are drawn and encoded; the
+    solver only waits when the queue is full. All background modes write
+    the same GIF as the time loop.
+
+    persistent=True builds the figure once and only redraws the field
+    lines per frame (PersistentRenderer); persistent=False rebuilds the
+    figure every frame like the scripts (ClassicRenderer).
+    """
+    st       = style(sc)
+    sim      = sc.simulation
+    two      = len(st.panels) == 2
+    material = sc.material
+
+    settings = (st, path, material, sim.k_max, persistent)
+
+    if background is None:
+        renderer = (PersistentRenderer if persistent else ClassicRenderer)(st, material, sim.k_max)
+        images   = []
+
+        def capture(sim, n):
+            images.append(renderer.frame(n, sim.Ex, sim.Hz if two else None))
+
+        sim.run(callback=capture, every=st.every, jit=jit)
+        _save(images, path)
+        return path
+
+    if background == 'thread':
+        frames = queue.Queue(maxsize=queue_size)
+        errors = []
+        worker = threading.Thread(target=_render_thread, args=(frames,) + settings + (errors,), daemon=True)
+    elif background == 'process':
+        frames = multiprocessing.Queue(maxsize=queue_size)
+        worker = multiprocessing.Process(target=_render, args=(frames,) + settings, daemon=True)
+    else:
+        raise ValueError("background must be None, 'thread' or 'process', got {!r}".format(background))
+    worker.start()
+
+    def capture(sim, n):
+        # Copy the snapshot; the solver only blocks while the queue is full
+        _put(frames, (n, sim.Ex.copy(), sim.Hz.copy() if two else None), worker)
+
+    try:
+        sim.run(callback=capture, every=st.every, jit=jit)
+    finally:
+        if worker.is_alive():
+            _put(frames, None, worker)
+        worker.join()
+    if background == 'thread' and errors:
+        raise errors[0]
+    if background == 'process' and worker.exitcode != 0:
+        raise RuntimeError('rendering worker exited with code {}'.format(worker.exitcode))
+    return path
+
+
+def _put(frames, item, worker):
+    # Blocking put that gives up if the rendering worker has died
+    while True:
+        try:
+            frames.put(item, timeout=1)
+            return
+        except queue.Full:
+            if not worker.is_alive():
+                raise RuntimeError('rendering worker stopped unexpectedly') from None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fdtd1d.animation',
+                                     description='Run an FDTD-1D scenario and save its GIF.')
+    parser.add_argument('scenario', choices=SCENARIOS, metavar='scenario', help='script name, e.g. 2-3')
+    parser.add_argument('-o', '--output', help='GIF file (default FDTD-1D-<scenario>.gif)')
+    parser.add_argument('--background', choices=['thread', 'process'],
+                        help='render frames in a background worker')
+    parser.add_argument('--classic', action='store_true',
+                        help='rebuild the figure every frame like the scripts')
+    args = parser.parse_args(argv)
+
+    path = args.output or 'FDTD-1D-{}.gif'.format(args.scenario)
+    save_gif(scenario(args.scenario), path, background=args.background, persistent=not args.classic)
+
+
+if __name__ == '__main__':
+    main()
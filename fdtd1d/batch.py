@@ -0,0 +1,264 @@
+# Batched ensemble: many simulations advanced as one 2-D array
+# Row i of Ex, Hz, Dx and ix is simulation i
+
+# Imports
+import numpy as np
+
+from .boundaries import PEC, AbsorbingBoundary, PECMask, PECRegion
+from .sources import Source, waveform_table
+
+# Source waveforms are tabulated this many time steps at a time
+BLOCK = 4096
+
+
+class Batch:
+    """Advance several Simulations of the same k_max together.
+
+    Fields are (n_scenarios, k_max) arrays and every coefficient is kept
+    per row, so one slice update steps all scenarios at once. The member
+    simulations must all use the basic or all the flux notation; sources
+    may be any Source that does not override active() (a soft source
+    stops injecting at waveform.end, as in Simulation) and boundaries
+    AbsorbingBoundary, PEC, PECRegion or PECMask.
+    Call unpack() to copy the fields back into the member simulations.
+    """
+
+    def __init__(self, simulations, n_max=None):
+        simulations = list(simulations)
+        if not simulations:
+            raise ValueError('Batch needs at least one simulation')
+        k_max = simulations[0].k_max
+        flux  = simulations[0].flux
+        dtype = simulations[0].dtype
+        for sim in simulations:
+            if sim.k_max != k_max:
+                raise ValueError('all simulations must share k_max, got {} and {}'.format(k_max, sim.k_max))
+            if sim.flux != flux:
+                raise ValueError('cannot batch basic and flux notation simulations together')
+            if sim.dtype != dtype:
+                raise ValueError('all simulations must share dtype, got {} and {}'.format(dtype, sim.dtype))
+            if sim.monitors:
+                raise ValueError('Batch does not support monitors')
+
+        self.simulations = simulations
+        self.k_max = k_max
+        self.n_max = max(sim.n_max for sim in simulations) if n_max is None else n_max
+        self.flux  = flux
+        self.dtype = dtype
+
+        # Per-row constants in update equations
+        self.courant = np.array([[sim.courant] for sim in simulations], dtype=dtype)
+        if flux:
+            self.const_a = np.array([sim.const_a for sim in simulations])
+            self.const_b = np.array([sim.const_b for sim in simulations])
+        else:
+            if all(sim.ca is None for sim in simulations):
+                self.ca = None
+            else:
+                self.ca = np.array([np.ones(k_max, dtype=dtype) if sim.ca is None else sim.ca for sim in simulations])
+            self.cb = np.array([sim.cb for sim in simulations])
+
+        # Flattened copies for the contiguous update in step()
+        if np.all(self.courant == self.courant[0, 0]):
+            self._courant_e = self._courant_h = self.courant[0, 0]
+        else:
+            courant = np.repeat(self.courant[:, 0], k_max)
+            self._courant_e, self._courant_h = courant[1:], courant[:-1]
+        for name in ('ca', 'cb', 'const_a', 'const_b'):
+            value = getattr(self, name, None)
+            setattr(self, '_' + name, None if value is None else value.reshape(-1))
+
+        self._collect_sources()
+        self._collect_boundaries()
+        self.reset()
+
+    @property
+    def n_scenarios(self):
+        return len(self.simulations)
+
+    def _collect_sources(self):
+        # Group sources by (field, hard) so each group is one fancy-index
+        # update; a group never holds the same (row, cell) twice
+        self.sources = []
+        groups = []
+        for row, sim in enumerate(self.simulations):
+            for source in sim.sources:
+                if type(source).active is not Source.active:
+                    raise ValueError('Batch does not support {}, which overrides active()'.format(type(source).__name__))
+                index = len(self.sources)
+                self.sources.append(source)
+                for group in groups:
+                    if (group['field'], group['hard']) == (source.field, source.hard) \
+                            and (row, source.cell) not in group['pairs']:
+                        break
+                else:
+                    group = dict(field=source.field, hard=source.hard, pairs=set(),
+                                 index=[], rows=[], cells=[])
+                    groups.append(group)
+                group['pairs'].add((row, source.cell))
+                group['index'].append(index)
+                group['rows'].append(row)
+                group['cells'].append(source.cell)
+        self._source_groups = [(g['field'], g['hard'], np.array(g['index']),
+                                np.array(g['rows']), np.array(g['cells'])) for g in groups]
+
+    def _collect_boundaries(self):
+        # Absorbing boundaries grouped by (side, delay, trace_every); PEC
+        # cells as a mask
+        absorbing = {}
+        self._pec = None
+        for row, sim in enumerate(self.simulations):
+            for boundary in sim.boundaries:
+                if type(boundary) is AbsorbingBoundary:
+                    key = (boundary.side, boundary.delay, boundary.trace_every)
+                    absorbing.setdefault(key, []).append((row, boundary))
+                elif type(boundary) in (PEC, PECRegion, PECMask):
+                    if self._pec is None:
+                        self._pec = np.zeros((self.n_scenarios, self.k_max), dtype=bool)
+                    if type(boundary) is PECMask:
+                        self._pec[row, boundary.cells] = True
+                    else:
+                        self._pec[row, boundary.start:boundary.stop] = True
+                else:
+                    raise ValueError('Batch does not support {}'.format(type(boundary).__name__))
+        self._absorbing = []
+        self._absorbing_owners = []
+        for (side, delay, trace_every), members in absorbing.items():
+            edge, inner = (0, 1) if side == 'lower' else (self.k_max-1, self.k_max-2)
+            rows = np.array([row for row, _ in members])
+            self._absorbing.append((rows, edge, inner, delay, trace_every))
+            self._absorbing_owners.append([boundary for _, boundary in members])
+
+    def reset(self):
+        shape   = (self.n_scenarios, self.k_max)
+        self.Ex = np.zeros(shape, dtype=self.dtype)
+        self.Hz = np.zeros(shape, dtype=self.dtype)
+        self.Dx = np.zeros(shape, dtype=self.dtype)
+        self.ix = np.zeros(shape)
+        self.n  = 0
+        # Scratch buffers (flat) for the terms of the in-place updates, the
+        # second one in double precision for the ix term
+        self._scratch = np.empty(self.n_scenarios*self.k_max, dtype=self.dtype)
+        self._scratch_ix = self._scratch if self.dtype == np.float64 else np.empty(self.n_scenarios*self.k_max)
+        # Ring buffers of the last states of the electric field next to
+        # each boundary, and the optional stride-decimated traces
+        self._rings  = [np.zeros((len(rows), delay)) for rows, _, _, delay, _ in self._absorbing]
+        self._traces = [None if every is None else np.zeros((len(rows), -(-self.n_max // every)))
+                        for rows, _, _, _, every in self._absorbing]
+        self._block_start = 0
+        self._values = np.empty((len(self.sources), 0))
+
+    def _inject(self, n, magnetic):
+        j = n - self._block_start
+        if j >= self._values.shape[1]:
+            self._block_start = n
+            self._values = waveform_table(self.sources, n, n + BLOCK)
+            # Step from which each source is no longer active()
+            self._ends = np.array([np.inf if source.hard or source.end is None else source.end
+                                   for source in self.sources])
+            j = 0
+        for field, hard, index, rows, cells in self._source_groups:
+            if (field == 'Hz') != magnetic:
+                continue
+            active = n < self._ends[index]
+            if not active.all():
+                index, rows, cells = index[active], rows[active], cells[active]
+            F = getattr(self, field)
+            if hard:
+                F[rows, cells] = self._values[index, j]
+            else:
+                F[rows, cells] = self._values[index, j] + F[rows, cells]
+
+    @staticmethod
+    def _flat(F):
+        return F.reshape(-1)
+
+    def step(self):
+        n     = self.n
+        k_max = self.k_max
+        Ex, Hz = self.Ex, self.Hz
+
+        # Update electric field
+        # The rows are updated as one flat array, which is contiguous and
+        # about twice as fast as 2-D slices; cell 0 of each row is not
+        # part of the update, so it is saved and restored around it
+        E, H = self._flat(Ex), self._flat(Hz)
+        d    = self._scratch[1:]
+        np.subtract(H[1:], H[:-1], out=d)
+        if self.flux:
+            Dx, ix = self.Dx, self.ix
+            D, I   = self._flat(Dx)[1:], self._flat(ix)[1:]
+            edge   = Ex[:, 0].copy(), Dx[:, 0].copy(), ix[:, 0].copy()
+            np.multiply(self._courant_e, d, out=d)
+            np.add(D, d, out=D)
+            np.subtract(D, I, out=E[1:])
+            np.multiply(self._const_b[1:], E[1:], out=E[1:])
+            t = self._scratch_ix[1:]
+            np.multiply(self._const_a[1:], E[1:], out=t)
+            np.add(I, t, out=I)
+            Ex[:, 0], Dx[:, 0], ix[:, 0] = edge
+        else:
+            edge = Ex[:, 0].copy()
+            np.multiply(self._cb[1:], d, out=d)
+            if self.ca is not None:
+                np.multiply(self._ca[1:], E[1:], out=E[1:])
+            np.add(E[1:], d, out=E[1:])
+            Ex[:, 0] = edge
+
+        # Electric field sources
+        self._inject(n, magnetic=False)
+
+        # Boundary conditions
+        for (rows, edge, inner, delay, every), ring, trace in zip(self._absorbing, self._rings, self._traces):
+            slot    = n % delay
+            delayed = ring[:, slot].copy()
+            ring[:, slot] = Ex[rows, inner]
+            if trace is not None and n % every == 0 and n // every < trace.shape[1]:
+                trace[:, n // every] = ring[:, slot]
+            if n >= delay:
+                Ex[rows, edge] = delayed
+        if self._pec is not None:
+            Ex[self._pec] = 0
+
+        # Update magnetic field (the last cell of each row is not updated)
+        edge = Hz[:, k_max-1].copy()
+        d    = self._scratch[:-1]
+        np.subtract(E[1:], E[:-1], out=d)
+        np.multiply(self._courant_h, d, out=d)
+        np.add(H[:-1], d, out=H[:-1])
+        Hz[:, k_max-1] = edge
+
+        # Magnetic field sources
+        self._inject(n, magnetic=True)
+
+        self.n = n + 1
+
+    def run(self, n_steps=None, callback=None, every=1):
+        """Advance n_steps time steps (default: up to n_max).
+
+        callback(batch, n) is called after every `every`-th step.
+        """
+        if n_steps is None:
+            n_steps = self.n_max - self.n
+        for _ in range(n_steps):
+            n = self.n
+            self.step()
+            if callback is not None and n % every == 0:
+                callback(self, n)
+        return self
+
+    def unpack(self):
+        """Copy each row back into its Simulation and return the list."""
+        for row, sim in enumerate(self.simulations):
+            sim.Ex[:] = self.Ex[row]
+            sim.Hz[:] = self.Hz[row]
+            sim.Dx[:] = self.Dx[row]
+            sim.ix[:] = self.ix[row]
+            sim.n     = self.n
+        for owners, ring, trace in zip(self._absorbing_owners, self._rings, self._traces):
+            for row, boundary in enumerate(owners):
+                boundary.ring[:] = ring[row]
+                if trace is not None:
+                    n = min(trace.shape[1], len(boundary.trace))
+                    boundary.trace[:n] = trace[row, :n]
+        return self.simulations
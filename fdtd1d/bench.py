@@ -0,0 +1,282 @@
+# Benchmarks and exactness checks of the update kernels
+# Each subcommand times one kernel variant against the plain update and
+# checks that the fields agree (bit for bit, unless stated otherwise)
+#
+# Command line:
+#   python -m fdtd1d.bench inplace --cells 1000000 --steps 200
+#   python -m fdtd1d.bench precision
+#   python -m fdtd1d.bench scaling --cells 20000000 --workers 1 2 4 8
+#   python -m fdtd1d.bench threads --cells 10000 100000 1000000 10000000
+#   python -m fdtd1d.bench tiling --cells 10000 100000 1000000 10000000
+
+# Imports
+import argparse
+import os
+import time
+
+import numpy as np
+
+from . import jit as _jit
+from .decomposition import run_decomposed
+from .scenarios import SCENARIOS, lossy, scenario
+
+FIELDS = ('Ex', 'Hz', 'Dx', 'ix')
+
+
+def expression_step(sim):
+    """One full-grid time step of sim written as plain slice expressions.
+
+    This is the update as the scripts write it, e.g.
+    Hz[:k_max-1] = Hz[:k_max-1] + 0.5*(Ex[1:] - Ex[:k_max-1]), with a
+    temporary array per term; the reference for the in-place kernel.
+    """
+    n     = sim.n
+    k_max = sim.k_max
+    Ex, Hz = sim.Ex, sim.Hz
+    if sim.flux:
+        Dx, ix = sim.Dx, sim.ix
+        Dx[1:] = Dx[1:] + sim.courant*(Hz[1:] - Hz[:k_max-1])
+        Ex[1:] = sim.const_b[1:]*(Dx[1:] - ix[1:])
+        ix[1:] = ix[1:] + sim.const_a[1:]*Ex[1:]
+    elif sim.ca is None:
+        Ex[1:] = Ex[1:] + sim.cb[1:]*(Hz[1:] - Hz[:k_max-1])
+    else:
+        Ex[1:] = sim.ca[1:]*Ex[1:] + sim.cb[1:]*(Hz[1:] - Hz[:k_max-1])
+    for source in sim.sources:
+        if source.field != 'Hz':
+            source.inject(sim, n)
+    for boundary in sim.boundaries:
+        boundary.apply(sim, n)
+    Hz[:k_max-1] = Hz[:k_max-1] + sim.courant*(Ex[1:] - Ex[:k_max-1])
+    for boundary in sim.boundaries:
+        if hasattr(boundary, 'apply_magnetic'):
+            boundary.apply_magnetic(sim, n)
+    for source in sim.sources:
+        if source.field == 'Hz':
+            source.inject(sim, n)
+    for monitor in sim.monitors:
+        monitor.record(sim, n)
+    sim.n = n + 1
+
+
+def _identical(a, b):
+    return all(np.array_equal(getattr(a, name), getattr(b, name)) for name in FIELDS)
+
+
+def inplace(cells=1000000, steps=200):
+    """Check the in-place NumPy step against expression_step and time both.
+
+    Every scenario is compared over its full n_max, then a cells-long
+    lossy slab in both notations over steps time steps. Returns True if
+    all fields are bit-for-bit identical.
+    """
+    same = True
+    for name in SCENARIOS:
+        reference = scenario(name).simulation
+        for _ in range(reference.n_max):
+            expression_step(reference)
+        sim = scenario(name).simulation.run(jit=False)
+        same &= _identical(reference, sim)
+    print('{} scenarios: {}'.format(len(SCENARIOS), 'identical' if same else 'DIFFERENT'))
+
+    for flux in (False, True):
+        reference = lossy('bench', 700e6, k_max=cells, n_max=steps, flux=flux).simulation
+        sim       = lossy('bench', 700e6, k_max=cells, n_max=steps, flux=flux).simulation
+        start = time.perf_counter()
+        for _ in range(steps):
+            expression_step(reference)
+        middle = time.perf_counter()
+        sim.run(jit=False)
+        end = time.perf_counter()
+        match = _identical(reference, sim)
+        same &= match
+        print('{} notation, {} cells x {} steps: expressions {:.3f} s, in place {:.3f} s ({:.2f}x), {}'.format(
+            'flux' if flux else 'basic', cells, steps, middle - start, end - middle,
+            (middle - start)/(end - middle), 'identical' if match else 'DIFFERENT'))
+    return same
+
+
+def _frames(sim, every, jit):
+    # Ex after every every-th step of a full run
+    frames = []
+    sim.run(callback=lambda sim, n: frames.append(sim.Ex.astype(float)), every=every, jit=jit)
+    return np.array(frames)
+
+
+def precision(names=None, cells=1000000, steps=200, every=5, jit=None):
+    """Accuracy and speed of single against double precision fields.
+
+    For each scenario (default: the 1d, 1g and Flux notation ones) prints
+    the largest difference of Ex over all frames (every every-th step),
+    relative to the peak |Ex| of the double precision run, then times a
+    cells-long slab in both notations. Returns the errors by scenario.
+    """
+    if names is None:
+        names = [name for name in SCENARIOS if name.startswith(('1d', '1g', '2-'))]
+    errors = {}
+    for name in names:
+        reference = _frames(scenario(name).simulation, every, jit)
+        single    = _frames(scenario(name, dtype=np.float32).simulation, every, jit)
+        errors[name] = np.abs(single - reference).max()/np.abs(reference).max()
+        print('{:8s} max |Ex32 - Ex64| / max |Ex64| = {:.2e}'.format(name, errors[name]))
+
+    for flux in (False, True):
+        times = []
+        for dtype in (np.float64, np.float32):
+            sim   = lossy('bench', 700e6, k_max=cells, n_max=steps, flux=flux, dtype=dtype).simulation
+            start = time.perf_counter()
+            sim.run(jit=jit)
+            times.append(time.perf_counter() - start)
+        print('{} notation, {} cells x {} steps: float64 {:.3f} s, float32 {:.3f} s ({:.2f}x)'.format(
+            'flux' if flux else 'basic', cells, steps, times[0], times[1], times[0]/times[1]))
+    return errors
+
+
+def scaling(cells=20000000, steps=50, workers=None, flux=False):
+    """Strong scaling of run_decomposed on a cells-long lossy slab.
+
+    Times steps time steps with each worker count (default: powers of two
+    up to the core count; 1 is the single-process NumPy step) and checks
+    the fields against the single-process run. Returns True if all match.
+    """
+    if workers is None:
+        workers = [1 << i for i in range(os.cpu_count().bit_length())]
+    same, serial, reference = True, None, None
+    for count in workers:
+        sim   = lossy('bench', 700e6, k_max=cells, n_max=steps, flux=flux).simulation
+        start = time.perf_counter()
+        if count == 1:
+            sim.run(jit=False)
+        else:
+            run_decomposed(sim, workers=count)
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            serial, reference = elapsed, sim
+            match = True
+        else:
+            match = _identical(reference, sim)
+        same &= match
+        print('{:3d} workers: {:.3f} s, speed-up {:.2f}, efficiency {:.0%}, {}'.format(
+            count, elapsed, serial/elapsed, serial/elapsed/count, 'identical' if match else 'DIFFERENT'))
+    return same
+
+
+def threads(cells=(10000, 100000, 1000000, 10000000), steps=200, flux=False):
+    """Threaded against serial compiled kernel for several grid sizes.
+
+    The serial time is taken with one Numba thread; the threaded one with
+    all of them, using as many chunks as jit.chunks() picks (1 means the
+    automatic serial fallback). Returns True if all fields match.
+    """
+    if not _jit.HAVE_NUMBA:
+        raise ImportError('the threaded kernel requires numba (pip install numba)')
+    available = _jit.numba.get_num_threads()
+    same = True
+    for k_max in cells:
+        times, results = [], []
+        for count in (1, available):
+            _jit.numba.set_num_threads(count)
+            try:
+                sim = lossy('bench', 700e6, k_max=k_max, n_max=steps, flux=flux).simulation
+                sim.run(1, jit=True)
+                start = time.perf_counter()
+                sim.run(jit=True)
+                times.append(time.perf_counter() - start)
+                results.append(sim)
+            finally:
+                _jit.numba.set_num_threads(available)
+        match = _identical(*results)
+        same &= match
+        print('{:9d} cells: serial {:.4f} s, {} threads in {} chunks {:.4f} s ({:.2f}x), {}'.format(
+            k_max, times[0], available, _jit.chunks(k_max), times[1], times[0]/times[1],
+            'identical' if match else 'DIFFERENT'))
+    return same
+
+
+def tiling(cells=(10000, 30000, 100000, 300000, 1000000, 3000000, 10000000), work=10**9, flux=False):
+    """Tiled against plain serial compiled kernel for several grid sizes.
+
+    Each grid runs about work/cells time steps (at least 4*jit.TILE_STEPS)
+    on both kernels. Prints the time per cell and step and the smallest
+    size from which the tiled kernel is at least 10% faster at every
+    larger size, the crossover that jit.TILE_MIN should match. Returns
+    True if all fields match.
+    """
+    if not _jit.HAVE_NUMBA:
+        raise ImportError('the tiled kernel requires numba (pip install numba)')
+    same, faster = True, []
+    for k_max in cells:
+        steps = max(4*_jit.TILE_STEPS, work // k_max)
+        times, results = [], []
+        for kernel in ('serial', 'tiled'):
+            sim = lossy('bench', 700e6, k_max=k_max, n_max=steps + 1, flux=flux).simulation
+            _jit.advance(sim, 1, kernel)
+            start = time.perf_counter()
+            _jit.advance(sim, steps, kernel)
+            times.append(time.perf_counter() - start)
+            results.append(sim)
+        match = _identical(*results)
+        same &= match
+        faster.append(times[1] < 0.9*times[0])
+        print('{:9d} cells x {:6d} steps: plain {:.2f} ns, tiled {:.2f} ns per cell and step ({:.2f}x), {}'.format(
+            k_max, steps, times[0]/steps/k_max*1e9, times[1]/steps/k_max*1e9, times[0]/times[1],
+            'identical' if match else 'DIFFERENT'))
+    crossover = len(faster)
+    while crossover > 0 and faster[crossover - 1]:
+        crossover -= 1
+    if crossover == len(faster):
+        print('crossover: the tiled kernel does not gain at {} cells'.format(cells[-1]))
+    else:
+        print('crossover: the tiled kernel is at least 10% faster from {} cells (jit.TILE_MIN = {})'.format(
+            cells[crossover], _jit.TILE_MIN))
+    return same
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fdtd1d.bench',
+                                     description='Benchmark and check the FDTD-1D update kernels.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('inplace', help='in-place NumPy step against the slice expressions')
+    command.add_argument('--cells', type=int, default=1000000, help='cells of the timed slab')
+    command.add_argument('--steps', type=int, default=200, help='time steps of the timed slab')
+    command = commands.add_parser('precision', help='float32 fields against the float64 reference')
+    command.add_argument('--scenarios', nargs='+', choices=SCENARIOS, metavar='scenario',
+                         help='scenarios to compare (default: 1d, 1g and Flux notation)')
+    command.add_argument('--cells', type=int, default=1000000, help='cells of the timed slab')
+    command.add_argument('--steps', type=int, default=200, help='time steps of the timed slab')
+    command.add_argument('--no-jit', action='store_true', help='time the NumPy step only')
+    command = commands.add_parser('scaling', help='strong scaling of the domain decomposition')
+    command.add_argument('--cells', type=int, default=20000000, help='cells of the slab')
+    command.add_argument('--steps', type=int, default=50, help='time steps')
+    command.add_argument('--workers', type=int, nargs='+', help='worker counts (default: 1, 2, 4, ... cores)')
+    command.add_argument('--flux', action='store_true', help='use the flux notation update')
+    command = commands.add_parser('threads', help='threaded against serial compiled kernel')
+    command.add_argument('--cells', type=int, nargs='+', default=[10000, 100000, 1000000, 10000000],
+                         help='grid sizes')
+    command.add_argument('--steps', type=int, default=200, help='time steps')
+    command.add_argument('--flux', action='store_true', help='use the flux notation update')
+    command = commands.add_parser('tiling', help='tiled against plain compiled kernel')
+    command.add_argument('--cells', type=int, nargs='+',
+                         default=[10000, 30000, 100000, 300000, 1000000, 3000000, 10000000], help='grid sizes')
+    command.add_argument('--work', type=int, default=10**9, help='cells times time steps per grid size')
+    command.add_argument('--flux', action='store_true', help='use the flux notation update')
+    args = parser.parse_args(argv)
+
+    if args.command == 'inplace':
+        if not inplace(args.cells, args.steps):
+            parser.exit(1)
+    elif args.command == 'precision':
+        precision(args.scenarios, args.cells, args.steps, jit=False if args.no_jit else None)
+    elif args.command == 'scaling':
+        if not scaling(args.cells, args.steps, args.workers, args.flux):
+            parser.exit(1)
+    elif args.command == 'threads':
+        if not threads(args.cells, args.steps, args.flux):
+            parser.exit(1)
+    elif args.command == 'tiling':
+        if not tiling(args.cells, args.work, args.flux):
+            parser.exit(1)
+
+
+if __name__ == '__main__':
+    main()
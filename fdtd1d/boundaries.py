@@ -0,0 +1,336 @@
+# Boundary conditions applied to the electric field after each E update
+# Boundaries with an apply_magnetic method are also called after the H update
+
+# Imports
+import numpy as np
+
+
+def _sides(side):
+    if side not in ('lower', 'upper'):
+        raise ValueError("side must be 'lower' or 'upper', got {!r}".format(side))
+    return side
+
+
+def _edge_cells(sim, side):
+    # (edge, inner, next inner) cell indices at one end of the domain
+    if side == 'lower':
+        return 0, 1, 2
+    return sim.k_max-1, sim.k_max-2, sim.k_max-3
+
+
+def _wave_speed(sim, edge, eps_r=None):
+    # Courant number of the wave at cell edge: courant/sqrt(eps_r), with
+    # eps_r taken from the update coefficients unless given
+    if eps_r is None:
+        eps_r = 1/sim.const_b[edge] if sim.flux else sim.courant/sim.cb[edge]
+    return sim.courant/np.sqrt(eps_r)
+
+
+def _update_edge_e(sim, k, dH):
+    # E update of a single cell k from the given H difference
+    if sim.flux:
+        sim.Dx[k] = sim.Dx[k] + sim.courant*dH
+        sim.Ex[k] = sim.const_b[k]*(sim.Dx[k] - sim.ix[k])
+        sim.ix[k] = sim.ix[k] + sim.const_a[k]*sim.Ex[k]
+    elif sim.ca is None:
+        sim.Ex[k] = sim.Ex[k] + sim.cb[k]*dH
+    else:
+        sim.Ex[k] = sim.ca[k]*sim.Ex[k] + sim.cb[k]*dH
+
+
+class AbsorbingBoundary:
+    """Simple absorbing boundary at one end of the domain.
+
+    The edge cell takes the value its neighbour had `delay` time steps
+    earlier. With a factor of 0.5 a wave needs two time steps to cross a
+    cell, so delay=2 absorbs in free space (delay=4 inside eps_r = 4).
+
+    Only the last `delay` samples are read back, so they are kept in a
+    ring buffer and memory does not grow with the run length. Set
+    trace_every to also record the field next to the boundary (the
+    scripts' Lower/Upper_Boundary) every trace_every-th time step; the
+    trace holds steps 0, trace_every, 2*trace_every, ... below n_max.
+    """
+
+    # Arrays that make up the boundary's state (saved by checkpoints)
+    state = ('ring', 'trace')
+
+    def __init__(self, side='lower', delay=2, trace_every=None):
+        _sides(side)
+        if delay < 1:
+            raise ValueError('delay must be at least 1, got {}'.format(delay))
+        if trace_every is not None and trace_every < 1:
+            raise ValueError('trace_every must be at least 1, got {}'.format(trace_every))
+        self.side        = side
+        self.delay       = delay
+        self.trace_every = trace_every
+
+    def bind(self, sim):
+        # Last `delay` states of the electric field next to the boundary;
+        # step n is stored in slot n % delay
+        self.ring = np.zeros(self.delay)
+        if self.trace_every is None:
+            self.trace = None
+        else:
+            self.trace = np.zeros(-(-sim.n_max // self.trace_every))
+        self.edge, self.inner, _ = _edge_cells(sim, self.side)
+
+    def apply(self, sim, n):
+        Ex   = sim.Ex
+        slot = n % self.delay
+        # The slot still holds step n-delay until it is overwritten
+        delayed = self.ring[slot]
+        self.ring[slot] = Ex[self.inner]
+        if self.trace is not None and n % self.trace_every == 0 and n // self.trace_every < len(self.trace):
+            self.trace[n // self.trace_every] = Ex[self.inner]
+        if n >= self.delay:
+            Ex[self.edge] = delayed
+
+
+class PECRegion:
+    """Perfect electric conductor: Ex is forced to zero in cells [start, stop)."""
+
+    def __init__(self, start, stop):
+        self.start = start
+        self.stop  = stop
+
+    def bind(self, sim):
+        pass
+
+    def apply(self, sim, n):
+        sim.Ex[self.start:self.stop] = 0
+
+
+class PEC(PECRegion):
+    """Perfect electric conductor at one end of the domain (Ex[edge] = 0)."""
+
+    def __init__(self, side='lower'):
+        self.side = _sides(side)
+
+    def bind(self, sim):
+        edge, _, _ = _edge_cells(sim, self.side)
+        self.start, self.stop = edge, edge + 1
+
+
+class PECMask:
+    """Perfect electric conductor on an arbitrary set of cells.
+
+    mask is a boolean array of length k_max (or an array of cell indices);
+    the cells are resolved once in bind. A mask of at most MAX_RUNS
+    contiguous conductors is applied as one slice assignment per
+    conductor, any other as a single fancy-index assignment.
+    """
+
+    MAX_RUNS = 8
+
+    def __init__(self, mask):
+        self.mask = np.asarray(mask)
+
+    def bind(self, sim):
+        if self.mask.dtype == bool:
+            if self.mask.shape != (sim.k_max,):
+                raise ValueError('mask must have shape ({},), got {}'.format(sim.k_max, self.mask.shape))
+            self.cells = np.flatnonzero(self.mask)
+        else:
+            self.cells = np.unique(self.mask.astype(int))
+        # Contiguous runs [start, stop) of conductor cells
+        breaks    = np.flatnonzero(np.diff(self.cells) != 1) + 1
+        self.runs = [(int(run[0]), int(run[-1]) + 1) for run in np.split(self.cells, breaks) if len(run)]
+
+    def apply(self, sim, n):
+        if len(self.runs) <= self.MAX_RUNS:
+            for start, stop in self.runs:
+                sim.Ex[start:stop] = 0
+        else:
+            sim.Ex[self.cells] = 0
+
+
+class PMC:
+    """Perfect magnetic conductor at one end of the domain.
+
+    At the lower end the wall is on the Ex[0] node: Hz is mirrored with
+    opposite sign, so Ex[0] is updated with Hz[0] - (-Hz[0]). At the upper
+    end the wall is on the last Hz node, which is held at 0.
+    """
+
+    def __init__(self, side='lower'):
+        self.side = _sides(side)
+
+    def bind(self, sim):
+        pass
+
+    def apply(self, sim, n):
+        if self.side == 'lower':
+            _update_edge_e(sim, 0, 2*sim.Hz[0])
+
+    def apply_magnetic(self, sim, n):
+        if self.side == 'upper':
+            sim.Hz[sim.k_max-1] = 0
+
+
+class Periodic:
+    """Periodic domain: cell k_max-1 is followed by cell 0.
+
+    Completes the two updates the bulk leaves out: Ex[0] from Hz[0] -
+    Hz[k_max-1] and Hz[k_max-1] from Ex[0] - Ex[k_max-1].
+    """
+
+    periodic = True
+
+    def bind(self, sim):
+        pass
+
+    def apply(self, sim, n):
+        _update_edge_e(sim, 0, sim.Hz[0] - sim.Hz[sim.k_max-1])
+
+    def apply_magnetic(self, sim, n):
+        k = sim.k_max-1
+        sim.Hz[k] = sim.Hz[k] + sim.courant*(sim.Ex[0] - sim.Ex[k])
+
+
+class MurBoundary:
+    """First- or second-order Mur absorbing boundary for any Courant number.
+
+    order=1 is Mur's one-way wave condition
+        Ex0[n+1] = Ex1[n] + r*(Ex1[n+1] - Ex0[n]),  r = (S - 1)/(S + 1)
+    with S = courant/sqrt(eps_r) the wave's Courant number at the edge.
+    order=2 applies the same operator twice (Higdon), which reads three
+    cells and two earlier time steps and cancels the leading reflection
+    left by first order away from S = 1.
+    """
+
+    state = ('previous', 'older')
+
+    def __init__(self, side='lower', order=1, eps_r=None):
+        _sides(side)
+        if order not in (1, 2):
+            raise ValueError('order must be 1 or 2, got {}'.format(order))
+        self.side  = side
+        self.order = order
+        self.eps_r = eps_r
+
+    def bind(self, sim):
+        self.cells = np.array(_edge_cells(sim, self.side))
+        S = _wave_speed(sim, self.cells[0], self.eps_r)
+        self.r = (S - 1)/(S + 1)
+        # Ex at the edge cells one and two time steps ago
+        self.previous = np.zeros(3)
+        self.older    = np.zeros(3)
+
+    def apply(self, sim, n):
+        Ex    = sim.Ex
+        r     = self.r
+        e     = Ex[self.cells]
+        e1, e2 = self.previous, self.older
+        if self.order == 1:
+            edge = e1[1] + r*(e[1] - e1[0])
+        else:
+            edge = (2*r*e[1] - r*r*e[2]
+                    + 2*(-r*e1[0] + (1 + r*r)*e1[1] - r*e1[2])
+                    - (e2[2] - 2*r*e2[1] + r*r*e2[0]))
+        Ex[self.cells[0]] = edge
+        e[0] = edge
+        self.older, self.previous = e1, e
+
+
+class CPML:
+    """Convolutional perfectly matched layer in the last `thickness` cells of one side.
+
+    Inside the layer the spatial differences of both updates are stretched,
+    dH -> dH/kappa + psi (and likewise for dE), with sigma and kappa graded
+    as (depth/thickness)**grading and alpha falling linearly from alpha_max
+    at the inner edge. sigma_max is set from the target normal-incidence
+    reflection and the wave speed in the material at the layer, so the
+    layer absorbs for any Courant number and permittivity; eps_r defaults
+    to the value implied by the coefficients at the edge cell.
+
+    psi is integrated with the trapezoidal rule, psi = b*psi + a*(dH +
+    previous dH). The usual exponential recursion (psi = b*psi + a*dH)
+    acts like a lower Courant number at wavelengths of a few cells, which
+    reflects them off the layer near courant = 1; the trapezoidal one
+    leaves the grid unchanged at the Nyquist frequency. A small alpha_max
+    keeps psi from integrating a static field in the layer indefinitely.
+
+    The CPML terms are added as corrections after the E update (apply) and
+    after the H update (apply_magnetic), so the bulk updates are unchanged.
+    """
+
+    state = ('psi_e', 'psi_h', 'dH', 'dE')
+
+    def __init__(self, side='lower', thickness=20, grading=3, reflection=1e-8,
+                 kappa_max=1.0, alpha_max=1e-3, eps_r=None):
+        _sides(side)
+        if thickness < 1:
+            raise ValueError('thickness must be at least 1 cell, got {}'.format(thickness))
+        self.side       = side
+        self.thickness  = thickness
+        self.grading    = grading
+        self.reflection = reflection
+        self.kappa_max  = kappa_max
+        self.alpha_max  = alpha_max
+        self.eps_r      = eps_r
+
+    def _profile(self, depth, speed):
+        # b and a coefficients and 1/kappa - 1 at the given depths (0..1)
+        sigma_max = -(self.grading + 1)*np.log(self.reflection)*speed/(2*self.thickness)
+        sigma = sigma_max*depth**self.grading
+        kappa = 1 + (self.kappa_max - 1)*depth**self.grading
+        alpha = self.alpha_max*(1 - depth)
+        # Trapezoidal rule for d(psi)/dt = -(sigma/kappa + alpha)*psi - sigma/kappa**2*d
+        rate = sigma/kappa + alpha
+        b = (2 - rate)/(2 + rate)
+        a = -sigma/kappa**2/(2 + rate)
+        return b, a, 1/kappa - 1
+
+    def bind(self, sim):
+        k_max, N = sim.k_max, self.thickness
+        if 2*N >= k_max:
+            raise ValueError('CPML thickness {} does not fit in k_max = {}'.format(N, k_max))
+        # Ex nodes 1 .. k_max-1 and Hz nodes 0 .. k_max-2 (at k + 1/2) that
+        # lie inside the layer, and their depth into it
+        if self.side == 'lower':
+            self.e_cells = slice(1, N)
+            self.h_cells = slice(0, N)
+            e_depth = (N - np.arange(1, N))/N
+            h_depth = (N - np.arange(0, N) - 0.5)/N
+            edge    = 1
+        else:
+            self.e_cells = slice(k_max - N, k_max)
+            self.h_cells = slice(k_max - N - 1, k_max - 1)
+            e_depth = (np.arange(k_max - N, k_max) - (k_max - 1 - N))/N
+            h_depth = (np.arange(k_max - N - 1, k_max - 1) + 0.5 - (k_max - 1 - N))/N
+            edge    = k_max - 1
+        speed = _wave_speed(sim, edge, self.eps_r)
+        self.b_e, self.a_e, self.k_e = self._profile(e_depth, speed)
+        self.b_h, self.a_h, self.k_h = self._profile(h_depth, speed)
+        self.psi_e = np.zeros(len(e_depth))
+        self.psi_h = np.zeros(len(h_depth))
+        # Differences of the previous step, for the trapezoidal rule
+        self.dH = np.zeros(len(e_depth))
+        self.dE = np.zeros(len(h_depth))
+
+    def apply(self, sim, n):
+        # Correction to the E update: cb*(dH*(1/kappa - 1) + psi)
+        cells = self.e_cells
+        Hz    = sim.Hz
+        dH    = Hz[cells] - Hz[cells.start-1:cells.stop-1]
+        self.psi_e = self.b_e*self.psi_e + self.a_e*(dH + self.dH)
+        self.dH    = dH
+        stretch = dH*self.k_e + self.psi_e
+        if sim.flux:
+            dD = sim.courant*stretch
+            dE = sim.const_b[cells]*dD
+            sim.Dx[cells] += dD
+            sim.Ex[cells] += dE
+            sim.ix[cells] += sim.const_a[cells]*dE
+        else:
+            sim.Ex[cells] += sim.cb[cells]*stretch
+
+    def apply_magnetic(self, sim, n):
+        # Correction to the H update: courant*(dE*(1/kappa - 1) + psi)
+        cells = self.h_cells
+        Ex    = sim.Ex
+        dE    = Ex[cells.start+1:cells.stop+1] - Ex[cells]
+        self.psi_h = self.b_h*self.psi_h + self.a_h*(dE + self.dE)
+        self.dE    = dE
+        sim.Hz[cells] += sim.courant*(dE*self.k_h + self.psi_h)
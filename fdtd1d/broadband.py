@@ -0,0 +1,132 @@
+# Broadband runs: one modulated Gaussian pulse instead of one CW run per frequency
+# The response at every frequency is the DFT of the field normalized by the
+# DFT of the source waveform
+#
+# Command line:
+#   python -m fdtd1d.broadband 1e-iii --freq 1e9 1.3e9 1.6e9 1.9e9 -o 1e.npz
+
+# Imports
+import argparse
+import copy
+
+import numpy as np
+
+from .monitors import DFTMonitor
+from .scenarios import SCENARIOS, scenario
+from .sources import ModulatedGaussian, tabulate
+
+# Relative spectral amplitude of the pulse at the edges of the band
+EDGE = 1e-3
+
+# After the pulse, the run continues one round trip (2*k_max steps) at a
+# time until max |Ex| has decayed below DECAY times its largest value, for
+# at most MAX_ROUND_TRIPS round trips (slabs with reflecting edges ring long)
+DECAY           = 1e-4
+MAX_ROUND_TRIPS = 20
+
+
+class Response:
+    """Complex transfer function of a broadband run.
+
+    response[k, i] is the phasor of Ex at cell k for a unit sine source at
+    freqs[i]: a CW run with the same source settles to
+    Ex[k] = Im(response[k, i]*exp(j*w_i*n*dt)).
+    """
+
+    def __init__(self, freqs, cells, dt, response):
+        self.freqs    = freqs
+        self.cells    = cells
+        self.dt       = dt
+        self.response = response
+
+    def steady_state(self, i, n):
+        """Ex at time step n of the CW run at freqs[i], on the monitored cells."""
+        return np.imag(self.response[:, i]*np.exp(2j*np.pi*self.freqs[i]*n*self.dt))
+
+    def save(self, path):
+        np.savez(path, freqs=self.freqs, cells=self.cells, dt=self.dt, response=self.response)
+
+
+def pulse(freqs, dt, tolerance=1e-12):
+    """ModulatedGaussian centred on the band of freqs.
+
+    The envelope is as short as possible while the spectrum stays above
+    EDGE (relative) at the lowest and highest frequency.
+    """
+    f_min, f_max = np.min(freqs), np.max(freqs)
+    centre = (f_min + f_max)/2
+    band   = max((f_max - f_min)/2, centre*0.05)
+    spread = np.sqrt(-2*np.log(EDGE))/(2*np.pi*band*dt)
+    t_0    = spread*np.sqrt(-2*np.log(tolerance))
+    return ModulatedGaussian(centre, dt, spread=spread, t_0=t_0, tolerance=tolerance)
+
+
+def broadband(sc, freqs, cells=None, n_steps=None, jit=None):
+    """Response of a single-source Scenario at every frequency of freqs, from one run.
+
+    A copy of sc.simulation, with its source waveform replaced by
+    pulse(freqs, dt), is run with a DFTMonitor on cells (default: all
+    cells) accumulating Ex; sc itself is left untouched. By default the
+    run lasts until the pulse has ended and the field has decayed (see
+    DECAY); n_steps fixes its length instead.
+
+    The run is worth it when it is shorter than the CW runs it replaces,
+    len(freqs)*n_max steps: true for a handful of frequencies in domains
+    that absorb the pulse within a few round trips (1e, 1g, Flux notation),
+    less so for slabs that ring between reflecting edges.
+    """
+    sources = sc.simulation.sources
+    if len(sources) != 1:
+        raise ValueError('broadband needs a scenario with exactly one source, got {}'.format(len(sources)))
+    dt    = sc.parameters.get('dt', getattr(sources[0].waveform, 'dt', None))
+    if dt is None:
+        raise ValueError('cannot infer the time step of scenario {!r}'.format(sc.name))
+    sim   = copy.deepcopy(sc.simulation)
+    freqs = np.atleast_1d(np.asarray(freqs, dtype=float))
+    cells = np.arange(sim.k_max) if cells is None else np.atleast_1d(np.asarray(cells, dtype=int))
+
+    source = sim.sources[0]
+    source.waveform = pulse(freqs, dt)
+    monitor = DFTMonitor(cells, freqs, dt)
+    sim.monitors.append(monitor)
+    if n_steps is None:
+        sim.n_max = source.waveform.end + MAX_ROUND_TRIPS*2*sim.k_max
+        sim.reset()
+        sim.run(source.waveform.end, jit=jit)
+        peak = np.abs(sim.Ex).max()
+        while sim.n < sim.n_max:
+            sim.run(min(2*sim.k_max, sim.n_max - sim.n), jit=jit)
+            field = np.abs(sim.Ex).max()
+            peak  = max(peak, field)
+            if field <= DECAY*peak:
+                break
+        n_steps = sim.n
+    else:
+        sim.n_max = n_steps
+        sim.reset()
+        sim.run(jit=jit)
+
+    # Normalize by the DFT of the injected waveform
+    excitation = DFTMonitor([0], freqs, dt)
+    excitation.bind(sim)
+    excitation.accumulate('Ex', tabulate(source.waveform, 0, n_steps)[None, :], 0)
+    response = monitor.spectrum('Ex')/excitation.spectrum('Ex')
+    return Response(freqs, cells, dt, response)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fdtd1d.broadband',
+                                     description='Response of an FDTD-1D scenario at many frequencies from one pulse run.')
+    parser.add_argument('scenario', choices=SCENARIOS, metavar='scenario', help='script name, e.g. 1e-iii')
+    parser.add_argument('--freq', type=float, nargs='+', required=True, help='frequencies [Hz]')
+    parser.add_argument('--cells', type=int, nargs='*', help='cells to monitor (default all)')
+    parser.add_argument('--n-steps', type=int, help='time steps to run')
+    parser.add_argument('-o', '--output', required=True, help='.npz file to write')
+    args = parser.parse_args(argv)
+
+    result = broadband(scenario(args.scenario), args.freq, cells=args.cells, n_steps=args.n_steps)
+    result.save(args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# Checkpoint/restart of the full solver state
+# One uncompressed .npz file per checkpoint, written to a temporary file and
+# renamed over the previous one so an interrupted write never corrupts it
+
+# Imports
+import os
+
+import numpy as np
+
+# Bumped whenever the layout of a checkpoint changes
+VERSION = 2
+
+
+def _components(sim):
+    # (prefix, object) for every boundary and monitor with saved state
+    for i, boundary in enumerate(sim.boundaries):
+        yield 'boundary{}'.format(i), boundary
+    for i, monitor in enumerate(sim.monitors):
+        yield 'monitor{}'.format(i), monitor
+
+
+def state(sim):
+    """Everything needed to continue sim, as a dict of arrays.
+
+    Fields, step counter, active region and the state arrays listed in the
+    `state` attribute of each boundary and monitor (ring buffers, traces,
+    CPML and Mur memories, DFT sums). Sources need no state: their values
+    depend only on the time step.
+    """
+    arrays = dict(version=VERSION, k_max=sim.k_max, flux=sim.flux, n=sim.n,
+                  region=np.array(sim.region), Ex=sim.Ex, Hz=sim.Hz, Dx=sim.Dx, ix=sim.ix)
+    for prefix, component in _components(sim):
+        for name in getattr(component, 'state', ()):
+            value = getattr(component, name)
+            if isinstance(value, dict):
+                for key, item in value.items():
+                    arrays['{}.{}.{}'.format(prefix, name, key)] = item
+            elif value is not None:
+                arrays['{}.{}'.format(prefix, name)] = value
+    return arrays
+
+
+def restore(sim, arrays):
+    """Load a dict from state() into sim, which must be set up like the saved one."""
+    if int(arrays['version']) != VERSION:
+        raise ValueError('checkpoint version {} is not supported (expected {})'.format(int(arrays['version']), VERSION))
+    if int(arrays['k_max']) != sim.k_max or bool(arrays['flux']) != sim.flux:
+        raise ValueError('checkpoint is for k_max = {} (flux={}), simulation has k_max = {} (flux={})'.format(
+            int(arrays['k_max']), bool(arrays['flux']), sim.k_max, sim.flux))
+    if arrays['Ex'].dtype != sim.dtype:
+        raise ValueError('checkpoint fields are {}, simulation has dtype {}'.format(arrays['Ex'].dtype, sim.dtype))
+    sim.reset()
+    for name in ('Ex', 'Hz', 'Dx', 'ix'):
+        getattr(sim, name)[:] = arrays[name]
+    sim.n      = int(arrays['n'])
+    sim.region = [int(value) for value in arrays['region']]
+    for prefix, component in _components(sim):
+        for name in getattr(component, 'state', ()):
+            value = getattr(component, name)
+            if isinstance(value, dict):
+                for key in value:
+                    value[key] = np.array(arrays['{}.{}.{}'.format(prefix, name, key)])
+            elif value is not None:
+                setattr(component, name, np.array(arrays['{}.{}'.format(prefix, name)]))
+    return sim
+
+
+def save(sim, path):
+    """Write the state of sim to path atomically."""
+    tmp = '{}.tmp{}'.format(path, os.getpid())
+    try:
+        with open(tmp, 'wb') as f:
+            np.savez(f, **state(sim))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        # The previous checkpoint at path is untouched
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path
+
+
+def resume(sim, path):
+    """Load the checkpoint at path into sim and return it, ready for sim.run().
+
+    sim must be built the same way as the checkpointed simulation (e.g. by
+    the same scenario() call); the run then continues bit for bit.
+    """
+    with np.load(path) as arrays:
+        return restore(sim, dict(arrays))
@@ -0,0 +1,8 @@
+# Physical constants shared by every simulation
+
+# Imports
+import numpy as np
+
+mu_0    = 1.25663706e-6         # Permeability of free space (magnetic constant)
+eps_0   = 8.85418782e-12        # Permitivitty of free space (electric constant)
+c_0     = 1/np.sqrt(mu_0*eps_0) # Speed of light in a vacuum (2.99792458e8)
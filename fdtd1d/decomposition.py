@@ -0,0 +1,198 @@
+# Domain decomposition over worker processes
+# The grid is split into contiguous subdomains, one per process, that update
+# fields held in multiprocessing.shared_memory buffers; the coefficients
+# are shared the same way, so no process holds a private copy of the grid.
+# The one-cell halos (Hz[lo-1] for the E update, Ex[hi] for the H update)
+# are read straight from the neighbour's part of the shared buffer, with a
+# barrier after each half step so they are never read while being written
+#
+# For 10^7-10^8 cell domains; small grids run faster in one process
+
+# Imports
+import multiprocessing
+import os
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .boundaries import PECMask, PECRegion
+
+# Smallest subdomain worth a process of its own
+MIN_CELLS = 65536
+
+# Workers are started from a fork server rather than forked from the caller,
+# which may hold thread pools (e.g. the TBB layer behind the threaded Numba
+# kernel) that do not survive a fork and hang the interpreter at exit.
+# Scripts that call run_decomposed need an `if __name__ == '__main__':` guard
+START_METHOD = 'forkserver'
+
+
+def _local_boundaries(sim, lo, hi):
+    # (index, boundary) for the boundaries acting on cells lo .. hi-1;
+    # conductors are clipped to those cells, edge boundaries belong to the
+    # subdomain holding their edge
+    local = []
+    for i, boundary in enumerate(sim.boundaries):
+        if isinstance(boundary, PECRegion):
+            start, stop = max(boundary.start, lo), min(boundary.stop, hi)
+            if start < stop:
+                local.append((i, PECRegion(start, stop)))
+        elif isinstance(boundary, PECMask):
+            cells = boundary.cells[(boundary.cells >= lo) & (boundary.cells < hi)]
+            if len(cells):
+                clipped = PECMask(cells)
+                clipped.bind(sim)
+                local.append((i, clipped))
+        else:
+            edge = 0 if boundary.side == 'lower' else sim.k_max - 1
+            if lo <= edge < hi:
+                local.append((i, boundary))
+    return local
+
+
+def _check(sim, bounds):
+    # Everything a subdomain touches must be its own
+    if sim.monitors:
+        raise ValueError('run_decomposed does not support monitors')
+    if sim.track and sim.threshold > 0:
+        raise ValueError('run_decomposed updates the whole grid; use threshold=0 or track=False')
+    for boundary in sim.boundaries:
+        if getattr(boundary, 'periodic', False):
+            raise ValueError('run_decomposed does not support periodic boundaries')
+        if not isinstance(boundary, (PECRegion, PECMask)) and not hasattr(boundary, 'side'):
+            raise ValueError('run_decomposed does not support {}'.format(type(boundary).__name__))
+    # Edge boundaries reach up to their thickness plus a few cells inwards
+    depth = sim._margin + 1
+    if min(np.diff(bounds)) < depth:
+        raise ValueError('subdomains of {} cells are too small for the boundaries'.format(min(np.diff(bounds))))
+
+
+def _fields(sim):
+    # Fields that change during a run
+    return ('Ex', 'Hz', 'Dx', 'ix') if sim.flux else ('Ex', 'Hz')
+
+
+def _shared(sim):
+    # Grid-sized arrays the workers read from shared memory: the fields and
+    # the (read-only) update coefficients
+    if sim.flux:
+        return _fields(sim) + ('const_a', 'const_b')
+    return _fields(sim) + (('cb',) if sim.ca is None else ('ca', 'cb'))
+
+
+# Grid-sized arrays taken off sim while the workers start, so that spawn and
+# forkserver do not pickle a copy of them into every process
+_DETACHED = ('Ex', 'Hz', 'Dx', 'ix', 'ca', 'cb', 'const_a', 'const_b', '_scratch', '_scratch_ix')
+
+
+def _work(sim, lo, hi, n0, n_steps, names, barrier, results):
+    # Worker process: advance cells lo .. hi-1 of the shared fields
+    blocks = {name: shared_memory.SharedMemory(name=block) for name, (block, _) in names.items()}
+    try:
+        for name, block in blocks.items():
+            setattr(sim, name, np.ndarray(sim.k_max, dtype=names[name][1], buffer=block.buf))
+        sim._scratch    = np.empty(sim.k_max, dtype=sim.dtype)
+        sim._scratch_ix = sim._scratch if sim.dtype == np.float64 else np.empty(sim.k_max)
+        electric   = [s for s in sim.sources if lo <= s.cell < hi and s.field != 'Hz']
+        magnetic   = [s for s in sim.sources if lo <= s.cell < hi and s.field == 'Hz']
+        boundaries = _local_boundaries(sim, lo, hi)
+        e0, e1     = max(lo, 1), hi
+        h0, h1     = lo, min(hi, sim.k_max - 1)
+        for n in range(n0, n0 + n_steps):
+            sim._update_electric(e0, e1)
+            for source in electric:
+                source.inject(sim, n)
+            for _, boundary in boundaries:
+                boundary.apply(sim, n)
+            barrier.wait()
+            sim._update_magnetic(h0, h1)
+            for _, boundary in boundaries:
+                if hasattr(boundary, 'apply_magnetic'):
+                    boundary.apply_magnetic(sim, n)
+            for source in magnetic:
+                source.inject(sim, n)
+            barrier.wait()
+        results.put({i: {name: getattr(boundary, name) for name in getattr(boundary, 'state', ())}
+                     for i, boundary in boundaries})
+    except BaseException:
+        barrier.abort()
+        raise
+    finally:
+        for name in blocks:
+            setattr(sim, name, None)
+        for block in blocks.values():
+            block.close()
+
+
+def run_decomposed(sim, n_steps=None, workers=None, min_cells=MIN_CELLS):
+    """Advance sim by n_steps (default: up to n_max) on several processes.
+
+    The grid is split into up to `workers` (default: all cores) contiguous
+    subdomains of at least min_cells cells; each process runs the NumPy
+    update on its own cells of shared field buffers and the processes meet
+    at a barrier after every half step. Sources, boundaries and their
+    state act in the subdomain that holds their cells, so the result is
+    identical to sim.run(n_steps). Monitors and periodic boundaries are
+    not supported. With a single subdomain this is just sim.run(n_steps).
+    """
+    if n_steps is None:
+        n_steps = sim.n_max - sim.n
+    workers = min(workers or os.cpu_count(), sim.k_max // min_cells)
+    if workers <= 1 or n_steps <= 0:
+        return sim.run(n_steps)
+    bounds = np.linspace(0, sim.k_max, workers + 1).astype(int)
+    _check(sim, bounds)
+
+    context = multiprocessing.get_context(START_METHOD)
+    blocks  = {}
+    try:
+        for name in _shared(sim):
+            array = getattr(sim, name)
+            blocks[name] = shared_memory.SharedMemory(create=True, size=array.nbytes)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=blocks[name].buf)[:] = array
+        names     = {name: (block.name, getattr(sim, name).dtype.str) for name, block in blocks.items()}
+        barrier   = context.Barrier(workers)
+        results   = context.Queue()
+        processes = [context.Process(target=_work, args=(sim, lo, hi, sim.n, n_steps, names, barrier, results),
+                                     daemon=True)
+                     for lo, hi in zip(bounds[:-1], bounds[1:])]
+        detached = {name: getattr(sim, name) for name in _DETACHED if hasattr(sim, name)}
+        try:
+            for name in detached:
+                setattr(sim, name, None)
+            for process in processes:
+                process.start()
+        finally:
+            for name, value in detached.items():
+                setattr(sim, name, value)
+        states = {}
+        for _ in processes:
+            states.update(_get(results, processes))
+        for process in processes:
+            process.join()
+
+        for name in _fields(sim):
+            field = getattr(sim, name)
+            field[:] = np.ndarray(field.shape, dtype=field.dtype, buffer=blocks[name].buf)
+    finally:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+
+    for i, state in states.items():
+        for name, value in state.items():
+            setattr(sim.boundaries[i], name, value)
+    sim.n += n_steps
+    sim.region = [0, sim.k_max]
+    return sim
+
+
+def _get(results, processes):
+    # Blocking get that gives up if a worker has died
+    while True:
+        try:
+            return results.get(timeout=1)
+        except queue.Empty:
+            if any(process.exitcode not in (None, 0) for process in processes):
+                raise RuntimeError('a domain decomposition worker stopped unexpectedly') from None
@@ -0,0 +1,112 @@
+# Headless runs: fields, probes and boundary traces as arrays, no plotting
+# Nothing here (or in the rest of fdtd1d) imports matplotlib
+#
+# Command line:
+#   python -m fdtd1d.headless 2-3 --every 5 --probe 50 150 --trace-every 1 -o 2-3.npz
+
+# Imports
+import argparse
+
+import numpy as np
+
+from .boundaries import AbsorbingBoundary
+from .scenarios import SCENARIOS, scenario
+from .stability import Unstable, Watchdog
+
+
+class Recording:
+    """Arrays recorded by record().
+
+    steps       time step index of each snapshot
+    snapshots   dict field -> (len(steps), k_max) array
+    probes      dict field -> (n_steps, len(probe_cells)) time series
+    boundaries  dict 'lower'/'upper' -> field next to that boundary every
+                trace_every-th time step (the scripts' Lower/Upper_Boundary),
+                for absorbing boundaries created with trace_every
+    """
+
+    def __init__(self, steps, snapshots, probe_cells, probes, boundaries):
+        self.steps       = steps
+        self.snapshots   = snapshots
+        self.probe_cells = probe_cells
+        self.probes      = probes
+        self.boundaries  = boundaries
+
+    def save(self, path):
+        # Everything in one .npz file
+        arrays = dict(steps=self.steps, probe_cells=self.probe_cells)
+        arrays.update(('snapshot_' + name, value) for name, value in self.snapshots.items())
+        arrays.update(('probe_' + name, value) for name, value in self.probes.items())
+        arrays.update(('boundary_' + name, value) for name, value in self.boundaries.items())
+        np.savez(path, **arrays)
+
+
+def record(sim, every=5, fields=('Ex',), probes=(), probe_fields=('Ex',), n_steps=None, jit=None,
+           watchdog=None):
+    """Run sim without plotting and return a Recording.
+
+    A snapshot of each field in fields is kept after every `every`-th step
+    (the frames of the scripts' GIFs). Probe cells are sampled every time
+    step, so probes force one step per callback; leave probes empty to let
+    the compiled kernel run long stretches in one call. watchdog is
+    passed on to Simulation.run.
+    """
+    if n_steps is None:
+        n_steps = sim.n_max - sim.n
+    probe_cells = np.asarray(probes, dtype=int)
+    n_start     = sim.n
+
+    steps     = []
+    snapshots = {name: [] for name in fields}
+    series    = {name: np.zeros((n_steps, len(probe_cells))) for name in probe_fields}
+
+    def capture(sim, n):
+        if len(probe_cells):
+            for name in probe_fields:
+                series[name][n - n_start] = getattr(sim, name)[probe_cells]
+        if n % every == 0:
+            steps.append(n)
+            for name in fields:
+                snapshots[name].append(getattr(sim, name).copy())
+
+    sim.run(n_steps, callback=capture, every=1 if len(probe_cells) else every, jit=jit,
+            watchdog=watchdog)
+
+    boundaries = {}
+    for boundary in sim.boundaries:
+        if isinstance(boundary, AbsorbingBoundary) and boundary.trace is not None:
+            stride = boundary.trace_every
+            boundaries[boundary.side] = boundary.trace[-(-n_start // stride):-(-sim.n // stride)].copy()
+
+    snapshots = {name: np.array(frames).reshape(len(steps), sim.k_max) for name, frames in snapshots.items()}
+    return Recording(np.array(steps, dtype=int), snapshots, probe_cells, series, boundaries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fdtd1d.headless',
+                                     description='Run an FDTD-1D scenario without plotting and save the arrays.')
+    parser.add_argument('scenario', choices=SCENARIOS, metavar='scenario', help='script name, e.g. 2-3')
+    parser.add_argument('-o', '--output', required=True, help='.npz file to write')
+    parser.add_argument('--every', type=int, default=5, help='snapshot every N time steps')
+    parser.add_argument('--fields', nargs='+', default=['Ex'], choices=['Ex', 'Hz', 'Dx', 'ix'])
+    parser.add_argument('--probe', type=int, nargs='*', default=[], help='cells to sample every time step')
+    parser.add_argument('--trace-every', type=int, help='record the absorbing boundary traces every N time steps')
+    parser.add_argument('--watchdog', action='store_true', help='stop without saving if the run diverges')
+    args = parser.parse_args(argv)
+
+    sim = scenario(args.scenario).simulation
+    if args.trace_every is not None:
+        for boundary in sim.boundaries:
+            if isinstance(boundary, AbsorbingBoundary):
+                boundary.trace_every = args.trace_every
+        sim.reset()
+    try:
+        recording = record(sim, every=args.every, fields=args.fields, probes=args.probe,
+                           watchdog=Watchdog() if args.watchdog else None)
+    except Unstable as error:
+        parser.exit(1, '{}: {}\n'.format(args.scenario, error))
+    recording.save(args.output)
+
+
+if __name__ == '__main__':
+    main()
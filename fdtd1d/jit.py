@@ -0,0 +1,424 @@
+# Optional Numba kernel running the whole time loop in one compiled call
+# Falls back to the NumPy Simulation.step when Numba is not installed
+
+# Imports
+import numpy as np
+
+from .boundaries import PEC, AbsorbingBoundary, PECRegion
+from .monitors import DFTMonitor
+from .sources import Source, waveform_table
+
+try:
+    import numba
+except ImportError:  # pragma: no cover - depends on the environment
+    numba = None
+
+HAVE_NUMBA = numba is not None
+prange     = numba.prange if HAVE_NUMBA else range
+
+# Source waveforms are tabulated this many time steps at a time
+BLOCK = 65536
+
+# Threaded kernel: the E and H updates are split into chunks of at least
+# MIN_CHUNK cells, one per thread; smaller grids run the serial kernel,
+# where starting the threads twice per step would cost more than it saves.
+# Once the threaded kernel has run, the process holds Numba's thread pool
+# (TBB or OpenMP), which does not survive os.fork: start child processes
+# with 'forkserver' or 'spawn' afterwards (fdtd1d.decomposition does), not
+# with multiprocessing's Linux default 'fork', or they can hang at exit
+MIN_CHUNK = 65536
+
+# Tiled kernel (temporal blocking): grids of at least TILE_MIN cells are
+# advanced TILE_STEPS time steps at a time over tiles of TILE_CELLS cells,
+# whose fields and coefficients stay in the L1/L2 cache while the tile is
+# swept TILE_STEPS times. Smaller grids fit in the L2 cache as a whole; the
+# crossover moves with the cache size (python -m fdtd1d.bench tiling).
+# TILE_STEPS must stay below TILE_CELLS
+TILE_MIN   = 65536
+TILE_CELLS = 4096
+TILE_STEPS = 32
+
+# Field codes used inside the kernel
+_FIELDS = {'Ex': 0, 'Dx': 1, 'Hz': 2}
+
+# Boundary codes used inside the kernel
+_ABSORBING = 0
+_PEC       = 1
+
+
+def supports(sim):
+    """True if every source, boundary and monitor of sim has a compiled equivalent."""
+    return (all(type(source) is Source for source in sim.sources)
+            and all(type(boundary) in (AbsorbingBoundary, PEC, PECRegion) for boundary in sim.boundaries)
+            and all(type(monitor) is DFTMonitor for monitor in sim.monitors))
+
+
+def use_jit(sim, jit):
+    # jit=None picks the compiled kernel whenever it can run
+    if jit is None:
+        return HAVE_NUMBA and supports(sim)
+    if not jit:
+        return False
+    if not HAVE_NUMBA:
+        raise ImportError('jit=True requires numba (pip install numba)')
+    if not supports(sim):
+        raise ValueError('jit=True only supports Source, AbsorbingBoundary, PEC, PECRegion and DFTMonitor')
+    return True
+
+
+def chunks(k_max, threads=None):
+    """Number of chunks the threaded kernel splits k_max cells into.
+
+    One per Numba thread (numba.get_num_threads(), default: all cores),
+    as long as each holds at least MIN_CHUNK cells; 1 selects the serial
+    kernel.
+    """
+    if threads is None:
+        threads = numba.get_num_threads()
+    return max(1, min(threads, k_max // MIN_CHUNK))
+
+
+def tiled(sim, min_cells=TILE_MIN):
+    """True if sim can run on the tiled kernel and is large enough to gain.
+
+    The tiles cover the whole grid, so active-region tracking is not
+    supported.
+    """
+    return not sim.track and sim.k_max >= min_cells and sim.k_max > TILE_CELLS
+
+
+def advance(sim, n_steps, kernel=None):
+    """Advance sim by n_steps time steps with the compiled kernel.
+
+    Grids large enough for more than one chunk (see chunks()) use the
+    threaded kernel, which updates the chunks of each half step in
+    parallel; otherwise grids that tiled() accepts use the tiled kernel,
+    which advances cache-sized tiles several steps at a time. kernel
+    ('serial', 'threaded' or 'tiled') forces one; the result is the same
+    either way.
+    """
+    if n_steps <= 0:
+        return
+    if kernel is None:
+        kernel = 'threaded' if chunks(sim.k_max) > 1 else 'tiled' if tiled(sim) else 'serial'
+    elif kernel not in ('serial', 'threaded', 'tiled'):
+        raise ValueError("kernel must be 'serial', 'threaded' or 'tiled', not {!r}".format(kernel))
+    elif kernel == 'tiled' and not tiled(sim, 0):
+        raise ValueError('the tiled kernel needs track=False and more than {} cells'.format(TILE_CELLS))
+    k_max  = sim.k_max
+    n_stop = sim.n + n_steps
+
+    # Sources
+    sources   = sim.sources
+    src_cell  = np.array([s.cell for s in sources], dtype=np.int64)
+    src_field = np.array([_FIELDS[s.field] for s in sources], dtype=np.int64)
+    src_hard  = np.array([s.hard for s in sources], dtype=np.bool_)
+    src_end   = np.array([n_stop if s.end is None else s.end for s in sources], dtype=np.int64)
+
+    # Boundaries: (kind, edge/start, inner/stop, delay, trace stride, first
+    # traced multiple); absorbing rings are stacked into one array
+    n_bnd = len(sim.boundaries)
+    bnd   = np.zeros((n_bnd, 6), dtype=np.int64)
+    width = 0
+    for i, boundary in enumerate(sim.boundaries):
+        if type(boundary) is AbsorbingBoundary:
+            bnd[i, :4] = _ABSORBING, boundary.edge, boundary.inner, boundary.delay
+            if boundary.trace is not None:
+                # Trace entries of steps sim.n <= m*stride < n_stop are
+                # written to a buffer and copied into the trace afterwards
+                stride = boundary.trace_every
+                first  = -(-sim.n // stride)
+                last   = min(-(-n_stop // stride), len(boundary.trace))
+                bnd[i, 4:] = stride, first
+                width      = max(width, last - first)
+        else:
+            bnd[i, :4] = _PEC, boundary.start, boundary.stop, 0
+    ring  = np.zeros((n_bnd, max(1, int(bnd[:, 3].max(initial=0)))))
+    trace = np.zeros((n_bnd, width))
+    for i, boundary in enumerate(sim.boundaries):
+        if type(boundary) is AbsorbingBoundary:
+            ring[i, :boundary.delay] = boundary.ring
+
+    # Monitor cells are sampled every step into a (probe, step) block that
+    # the monitors transform once per block
+    probes      = [(monitor, field) for monitor in sim.monitors for field in monitor.fields]
+    probe_cell  = np.array([cell for monitor, _ in probes for cell in monitor.cells], dtype=np.int64)
+    probe_field = np.array([_FIELDS[field] for monitor, field in probes for _ in monitor.cells], dtype=np.int64)
+
+    if sim.flux:
+        c1, c2 = sim.const_a, sim.const_b
+    else:
+        c1 = np.ones(k_max, dtype=sim.dtype) if sim.ca is None else sim.ca
+        c2 = sim.cb
+
+    # The Courant factor in the precision of the fields, as in NumPy
+    courant = sim.dtype.type(sim.courant)
+
+    n_chunks = chunks(k_max) if kernel == 'threaded' else 1
+
+    # Active region: lo, hi, tracking on/off, edge margin, shrink period
+    region = np.array([sim.region[0], sim.region[1], sim.track, sim._margin, sim._shrink_every], dtype=np.int64)
+
+    while sim.n < n_stop:
+        n0     = sim.n
+        n1     = min(n0 + BLOCK, n_stop)
+        values  = waveform_table(sources, n0, n1)
+        samples = np.empty((len(probe_cell), n1 - n0))
+        if kernel == 'tiled':
+            _tiled(n0, n1 - n0, sim.Ex, sim.Hz, sim.Dx, sim.ix, sim.flux, c1, c2, courant,
+                   src_cell, src_field, src_hard, values, bnd, ring, trace,
+                   probe_cell, probe_field, samples, TILE_CELLS, TILE_STEPS)
+        else:
+            compiled = _threaded if kernel == 'threaded' else _kernel
+            compiled(n0, n1 - n0, sim.Ex, sim.Hz, sim.Dx, sim.ix, sim.flux, c1, c2, courant,
+                     src_cell, src_field, src_hard, src_end, values, bnd, ring, trace,
+                     probe_cell, probe_field, samples, region, sim.threshold, n_chunks)
+        row = 0
+        for monitor, field in probes:
+            monitor.accumulate(field, samples[row:row + len(monitor.cells)], n0)
+            row += len(monitor.cells)
+        sim.n = n1
+    sim.region = [int(region[0]), int(region[1])]
+
+    for i, boundary in enumerate(sim.boundaries):
+        if type(boundary) is AbsorbingBoundary:
+            boundary.ring[:] = ring[i, :boundary.delay]
+            if boundary.trace is not None:
+                first = bnd[i, 5]
+                last  = min(-(-n_stop // boundary.trace_every), len(boundary.trace))
+                boundary.trace[first:last] = trace[i, :last - first]
+
+
+def _loop(n0, n_steps, Ex, Hz, Dx, ix, flux, c1, c2, courant,
+          src_cell, src_field, src_hard, src_end, values, bnd, ring, trace,
+          probe_cell, probe_field, samples, region, threshold, n_chunks):
+    # Same update order as Simulation.step, one cell at a time. The E and H
+    # updates run over n_chunks chunks of cells, which are independent:
+    # prange is a plain range in the serial kernel, and in the threaded one
+    # the end of each prange loop is the barrier between half steps
+    k_max  = Ex.shape[0]
+    margin = region[3]
+    for j in range(n_steps):
+        n = n0 + j
+
+        # Cells to update (Simulation._grow)
+        e0, e1, h0, h1 = 1, k_max, 0, k_max-1
+        if region[2]:
+            lo, hi = region[0], region[1]
+            for i in range(src_cell.shape[0]):
+                if src_hard[i] or n < src_end[i]:
+                    lo = min(lo, src_cell[i])
+                    hi = max(hi, src_cell[i] + 1)
+            if lo >= hi:
+                e0, e1, h0, h1 = 1, 1, 0, 0
+            else:
+                if lo <= margin:
+                    lo = 0
+                if hi >= k_max - margin:
+                    hi = k_max
+                e0, e1 = max(lo, 1), min(hi + 1, k_max)
+                h0, h1 = max(lo - 1, 0), min(e1, k_max - 1)
+                lo, hi = h0, e1
+            region[0], region[1] = lo, hi
+
+        # Update electric field
+        size = (e1 - e0 + n_chunks - 1)//n_chunks
+        for c in prange(n_chunks):
+            k0 = e0 + c*size
+            _electric(Ex, Hz, Dx, ix, flux, c1, c2, courant, k0, min(k0 + size, e1))
+
+        # Electric field sources
+        for i in range(src_cell.shape[0]):
+            if src_field[i] == 2:
+                continue
+            F = Ex if src_field[i] == 0 else Dx
+            if src_hard[i]:
+                F[src_cell[i]] = values[i, j]
+            else:
+                F[src_cell[i]] = values[i, j] + F[src_cell[i]]
+
+        # Boundary conditions
+        for i in range(bnd.shape[0]):
+            if bnd[i, 0] == 0:
+                slot    = n % bnd[i, 3]
+                delayed = ring[i, slot]
+                ring[i, slot] = Ex[bnd[i, 2]]
+                stride = bnd[i, 4]
+                if stride > 0 and n % stride == 0:
+                    m = n // stride - bnd[i, 5]
+                    if m < trace.shape[1]:
+                        trace[i, m] = Ex[bnd[i, 2]]
+                if n >= bnd[i, 3]:
+                    Ex[bnd[i, 1]] = delayed
+            else:
+                for k in range(bnd[i, 1], bnd[i, 2]):
+                    Ex[k] = 0.0
+
+        # Update magnetic field
+        size = (h1 - h0 + n_chunks - 1)//n_chunks
+        for c in prange(n_chunks):
+            k0 = h0 + c*size
+            _magnetic(Ex, Hz, courant, k0, min(k0 + size, h1))
+
+        # Magnetic field sources
+        for i in range(src_cell.shape[0]):
+            if src_field[i] != 2:
+                continue
+            if src_hard[i]:
+                Hz[src_cell[i]] = values[i, j]
+            else:
+                Hz[src_cell[i]] = values[i, j] + Hz[src_cell[i]]
+
+        # Monitor samples
+        for p in range(probe_cell.shape[0]):
+            if probe_field[p] == 0:
+                samples[p, j] = Ex[probe_cell[p]]
+            elif probe_field[p] == 1:
+                samples[p, j] = Dx[probe_cell[p]]
+            else:
+                samples[p, j] = Hz[probe_cell[p]]
+
+        if region[2] and (n + 1) % region[4] == 0:
+            _shrink(Ex, Hz, region, threshold)
+
+
+def _electric_cells(Ex, Hz, Dx, ix, flux, c1, c2, courant, k0, k1):
+    # E update of cells k0 .. k1-1 on views indexed from 0, which Numba
+    # can vectorize (Hz[k-1] with a signed k cannot)
+    E, H, G = Ex[k0:k1], Hz[k0:k1], Hz[k0-1:k1-1]
+    if flux:
+        D, I = Dx[k0:k1], ix[k0:k1]
+        A, B = c1[k0:k1], c2[k0:k1]
+        for k in range(k1 - k0):
+            D[k] = D[k] + courant*(H[k] - G[k])
+            # Rounded to the field precision before the product, as in
+            # the NumPy step (a no-op in double precision)
+            E[k] = D[k] - I[k]
+            E[k] = B[k]*E[k]
+            I[k] = I[k] + A[k]*E[k]
+    else:
+        A, B = c1[k0:k1], c2[k0:k1]
+        for k in range(k1 - k0):
+            E[k] = A[k]*E[k] + B[k]*(H[k] - G[k])
+
+
+def _magnetic_cells(Ex, Hz, courant, k0, k1):
+    # H update of cells k0 .. k1-1, as _electric_cells
+    H, E, F = Hz[k0:k1], Ex[k0:k1], Ex[k0+1:k1+1]
+    for k in range(k1 - k0):
+        H[k] = H[k] + courant*(F[k] - E[k])
+
+
+def _tiled_loop(n0, n_steps, Ex, Hz, Dx, ix, flux, c1, c2, courant,
+                src_cell, src_field, src_hard, values, bnd, ring, trace,
+                probe_cell, probe_field, samples, width, depth):
+    # Temporal blocking over skewed tiles. Step n of cell k is split into
+    # the pair (E update of k, H update of k-1), k = 1 .. k_max-1; pair k
+    # of a step only needs pairs up to k+1 of the step before, so tiles
+    # that shift one cell to the left per step can run `depth` steps each,
+    # left to right, in place. Sources, boundaries and monitor samples of
+    # a cell happen in the tile step holding the pair that finishes it
+    k_max   = Ex.shape[0]
+    n_tiles = (k_max - 1)//width
+    for b in range(0, n_steps, depth):
+        steps = min(depth, n_steps - b)
+        for tile in range(n_tiles):
+            for t in range(steps):
+                j = b + t
+                n = n0 + j
+                # Pairs a .. z-1; the first and last tile keep the grid edges
+                a = 1 if tile == 0 else 1 + tile*width - t
+                z = k_max if tile == n_tiles - 1 else 1 + (tile + 1)*width - t
+
+                # Update electric field
+                _electric(Ex, Hz, Dx, ix, flux, c1, c2, courant, a, z)
+
+                # Electric field sources (cell 0 belongs to pair 1)
+                for i in range(src_cell.shape[0]):
+                    if src_field[i] == 2 or not a <= max(src_cell[i], 1) < z:
+                        continue
+                    F = Ex if src_field[i] == 0 else Dx
+                    if src_hard[i]:
+                        F[src_cell[i]] = values[i, j]
+                    else:
+                        F[src_cell[i]] = values[i, j] + F[src_cell[i]]
+
+                # Boundary conditions; the last tile always holds both the
+                # upper edge and its inner cell
+                for i in range(bnd.shape[0]):
+                    if bnd[i, 0] == 0:
+                        if not a <= max(bnd[i, 1], 1) < z:
+                            continue
+                        slot    = n % bnd[i, 3]
+                        delayed = ring[i, slot]
+                        ring[i, slot] = Ex[bnd[i, 2]]
+                        stride = bnd[i, 4]
+                        if stride > 0 and n % stride == 0:
+                            m = n // stride - bnd[i, 5]
+                            if m < trace.shape[1]:
+                                trace[i, m] = Ex[bnd[i, 2]]
+                        if n >= bnd[i, 3]:
+                            Ex[bnd[i, 1]] = delayed
+                    else:
+                        start = 0 if a == 1 else a
+                        for k in range(max(bnd[i, 1], start), min(bnd[i, 2], z)):
+                            Ex[k] = 0.0
+
+                # Update magnetic field
+                _magnetic(Ex, Hz, courant, a - 1, z - 1)
+
+                # Magnetic field sources (the last cell belongs to the last pair)
+                for i in range(src_cell.shape[0]):
+                    if src_field[i] != 2 or not a <= min(src_cell[i] + 1, k_max - 1) < z:
+                        continue
+                    if src_hard[i]:
+                        Hz[src_cell[i]] = values[i, j]
+                    else:
+                        Hz[src_cell[i]] = values[i, j] + Hz[src_cell[i]]
+
+                # Monitor samples, once both fields of the cell are final
+                for p in range(probe_cell.shape[0]):
+                    if not a <= min(probe_cell[p] + 1, k_max - 1) < z:
+                        continue
+                    if probe_field[p] == 0:
+                        samples[p, j] = Ex[probe_cell[p]]
+                    elif probe_field[p] == 1:
+                        samples[p, j] = Dx[probe_cell[p]]
+                    else:
+                        samples[p, j] = Hz[probe_cell[p]]
+
+
+def _shrink_loop(Ex, Hz, region, threshold):
+    # Simulation._shrink on the region array
+    k_max, margin = Ex.shape[0], region[3]
+    lo, hi = region[0], region[1]
+    if lo >= hi or (lo == 0 and hi == k_max):
+        return
+    first, last = -1, -1
+    for k in range(lo, hi):
+        if abs(Ex[k]) > threshold or abs(Hz[k]) > threshold:
+            if first < 0:
+                first = k
+            last = k
+    if first >= 0:
+        new_lo = 0 if lo == 0 else first
+        new_hi = k_max if hi == k_max else last + 1
+    elif lo == 0:
+        new_lo, new_hi = 0, min(hi, margin + 1)
+    elif hi == k_max:
+        new_lo, new_hi = max(lo, k_max - margin - 1), k_max
+    else:
+        new_lo, new_hi = k_max, 0
+    for k in range(lo, hi):
+        if k < new_lo or k >= new_hi:
+            Ex[k] = 0.0
+            Hz[k] = 0.0
+    region[0], region[1] = new_lo, new_hi
+
+
+_electric = numba.njit(cache=True, nogil=True)(_electric_cells) if HAVE_NUMBA else None
+_magnetic = numba.njit(cache=True, nogil=True)(_magnetic_cells) if HAVE_NUMBA else None
+_shrink = numba.njit(cache=True, nogil=True)(_shrink_loop) if HAVE_NUMBA else None
+_kernel   = numba.njit(cache=True, nogil=True)(_loop) if HAVE_NUMBA else None
+_threaded = numba.njit(cache=True, nogil=True, parallel=True)(_loop) if HAVE_NUMBA else None
+_tiled    = numba.njit(cache=True, nogil=True)(_tiled_loop) if HAVE_NUMBA else None
@@ -0,0 +1,64 @@
+# Frequency-domain monitors accumulated while the simulation runs
+# Reflection/transmission spectra without storing the time series
+
+# Imports
+import numpy as np
+
+# Samples are summed this many time steps at a time
+CHUNK = 256
+
+
+class DFTMonitor:
+    """Running discrete Fourier transform of fields at a few cells.
+
+    After every time step n the monitor adds F[cells]*exp(-j*w*t) for all
+    frequencies at once, with t = n*dt for Ex/Dx and (n + 1/2)*dt for Hz,
+    which is updated half a time step later. Memory is
+    len(cells)*len(freqs) per field, independent of n_max.
+
+    spectrum(field) returns the complex (len(cells), len(freqs)) sums; they
+    are not normalized, so take ratios of two monitors (or multiply by dt
+    for the continuous transform).
+    """
+
+    state = ('spectra',)
+
+    def __init__(self, cells, freqs, dt, fields=('Ex',)):
+        for field in fields:
+            if field not in ('Ex', 'Dx', 'Hz'):
+                raise ValueError("fields must be 'Ex', 'Dx' or 'Hz', got {!r}".format(field))
+        self.cells  = np.atleast_1d(np.asarray(cells, dtype=int))
+        self.freqs  = np.atleast_1d(np.asarray(freqs, dtype=float))
+        self.dt     = dt
+        self.fields = tuple(fields)
+        self.w      = 2*np.pi*self.freqs
+
+    def bind(self, sim):
+        self.spectra = {field: np.zeros((len(self.cells), len(self.freqs)), dtype=complex)
+                        for field in self.fields}
+
+    def _kernel(self, field, steps):
+        # exp(-j*w*t) for the given time steps, shape (len(steps), len(freqs))
+        t = (np.asarray(steps, dtype=float) + (0.5 if field == 'Hz' else 0.0))*self.dt
+        return np.exp(-1j*np.multiply.outer(t, self.w))
+
+    def record(self, sim, n):
+        for field in self.fields:
+            phasor = self._kernel(field, n)
+            self.spectra[field] += getattr(sim, field)[self.cells][:, None]*phasor
+
+    def accumulate(self, field, samples, n0):
+        """Add a block of samples of shape (len(cells), n) from steps n0 .. n0+n-1.
+
+        The terms are summed one step after the other, exactly as record()
+        would, so the spectra do not depend on how a run is split up.
+        """
+        for j0 in range(0, samples.shape[1], CHUNK):
+            block  = samples[:, j0:j0 + CHUNK]
+            steps  = np.arange(n0 + j0, n0 + j0 + block.shape[1])
+            terms  = block[:, :, None]*self._kernel(field, steps)[None, :, :]
+            sums   = np.concatenate([self.spectra[field][:, None, :], terms], axis=1)
+            self.spectra[field] = np.add.accumulate(sums, axis=1)[:, -1]
+
+    def spectrum(self, field='Ex'):
+        return self.spectra[field]
@@ -0,0 +1,149 @@
+# Shared-prefix runs: variants that only differ downstream of the source
+# are simulated together until the wave can reach the first difference, then
+# each variant forks from that state
+#
+# e.g. FDTD-1D-1e-i and 1e-ii differ only in the upper boundary, so the
+# first ~180 of their 800 time steps are computed once
+
+# Imports
+import numpy as np
+
+from . import checkpoint
+from .sources import tabulate
+
+# Cells kept between the causal front and the first differing cell
+MARGIN = 3
+
+
+def _coefficients(sim):
+    # Per-cell update constants, ca = 1 when absent
+    if sim.flux:
+        return [sim.const_a, sim.const_b]
+    return [np.ones(sim.k_max) if sim.ca is None else sim.ca, sim.cb]
+
+
+def _signature(component):
+    # Hashable description of a boundary or monitor set-up (not its state)
+    items = []
+    for name, value in sorted(vars(component).items()):
+        if name in getattr(component, 'state', ()) or name.startswith('_'):
+            continue
+        if isinstance(value, np.ndarray):
+            value = (value.dtype.str, value.shape, value.tobytes())
+        elif isinstance(value, dict):
+            continue
+        items.append((name, value))
+    return (type(component).__name__, tuple(items))
+
+
+def _reach(boundary, k_max):
+    # Cells a boundary reads or writes
+    if hasattr(boundary, 'cells') and not hasattr(boundary, 'side'):
+        return list(np.atleast_1d(boundary.cells))
+    if hasattr(boundary, 'start'):
+        return [boundary.start, boundary.stop - 1]
+    depth = getattr(boundary, 'thickness', 0) + MARGIN
+    side  = getattr(boundary, 'side', None)
+    if side == 'lower':
+        return [depth - 1]
+    if side == 'upper':
+        return [k_max - depth]
+    return [0, k_max - 1]
+
+
+def divergence(simulations):
+    """Cells at which any of simulations differs from the first one.
+
+    Returns None when the set-ups cannot share any steps (different grid,
+    notation, Courant number, precision, active-region tracking, sources
+    or monitors), else a sorted list of cells.
+    """
+    first = simulations[0]
+    n_max = max(sim.n_max for sim in simulations)
+    cells = set()
+    for sim in simulations[1:]:
+        if (sim.k_max, sim.flux, sim.courant, sim.dtype, sim.track, sim.threshold) \
+                != (first.k_max, first.flux, first.courant, first.dtype, first.track, first.threshold):
+            return None
+        # Monitors accumulate from the first step, so they must all match
+        if [_signature(m) for m in sim.monitors] != [_signature(m) for m in first.monitors]:
+            return None
+        if len(sim.sources) != len(first.sources):
+            return None
+        for a, b in zip(first.sources, sim.sources):
+            if (a.cell, a.field, a.hard) != (b.cell, b.field, b.hard) \
+                    or not np.array_equal(tabulate(a.waveform, 0, n_max), tabulate(b.waveform, 0, n_max)):
+                return None
+        for c1, c2 in zip(_coefficients(first), _coefficients(sim)):
+            cells.update(np.flatnonzero(c1 != c2).tolist())
+        ours   = {_signature(b): b for b in first.boundaries}
+        theirs = {_signature(b): b for b in sim.boundaries}
+        for key in set(ours) ^ set(theirs):
+            cells.update(_reach(ours.get(key) or theirs[key], sim.k_max))
+    return sorted(cells)
+
+
+def shared_steps(simulations):
+    """Number of time steps that are identical for all simulations."""
+    cells = divergence(simulations)
+    if cells is None:
+        return 0
+    if not cells:
+        return min(sim.n_max for sim in simulations)
+    # After n steps the field of a source at s spans cells s-n .. s+n
+    gap = min(abs(d - source.cell) for d in cells for source in simulations[0].sources)
+    return max(0, min(gap - MARGIN, min(sim.n_max for sim in simulations)))
+
+
+def fork(trunk, sim):
+    """Copy the state of trunk into the fresh simulation sim.
+
+    Fields, step counter and active region are copied; boundary and
+    monitor state only where sim has the same component set-up (the others
+    are still untouched by the wave). State arrays sized from n_max, such
+    as boundary traces, keep sim's own length.
+    """
+    arrays = checkpoint.state(trunk)
+    sim.reset()
+    for name in ('Ex', 'Hz', 'Dx', 'ix'):
+        getattr(sim, name)[:] = arrays[name]
+    sim.n      = trunk.n
+    sim.region = list(trunk.region)
+    for ours, theirs in ((trunk.boundaries, sim.boundaries), (trunk.monitors, sim.monitors)):
+        by_signature = {_signature(component): component for component in ours}
+        for component in theirs:
+            source = by_signature.get(_signature(component))
+            if source is None:
+                continue
+            for name in getattr(component, 'state', ()):
+                value = getattr(source, name)
+                own = getattr(component, name)
+                if isinstance(value, dict):
+                    setattr(component, name, {key: item.copy() for key, item in value.items()})
+                elif isinstance(own, np.ndarray) and own.shape != value.shape:
+                    # Sized from sim's own n_max (AbsorbingBoundary.trace):
+                    # only the entries the trunk has written so far carry over
+                    rows = min(len(own), len(value))
+                    own[:rows] = value[:rows]
+                elif value is not None:
+                    setattr(component, name, value.copy())
+    return sim
+
+
+def run_shared(simulations, jit=None, watchdog=None):
+    """Run fresh simulations to their n_max, sharing their common prefix.
+
+    The first simulation runs the shared steps, every other one forks
+    from it, and then all of them finish on their own. The result is the
+    same as running each one separately. Returns the simulations.
+    watchdog is passed on to every Simulation.run.
+    """
+    simulations = list(simulations)
+    if any(sim.n for sim in simulations):
+        raise ValueError('run_shared needs freshly reset simulations')
+    trunk = simulations[0]
+    trunk.run(shared_steps(simulations), jit=jit, watchdog=watchdog)
+    for sim in simulations[1:]:
+        fork(trunk, sim).run(jit=jit, watchdog=watchdog)
+    trunk.run(jit=jit, watchdog=watchdog)
+    return simulations
@@ -0,0 +1,160 @@
+# Lightweight GIF renderer that bypasses matplotlib
+# Field lines are rasterized with NumPy into a preallocated uint8 frame
+# and written by Pillow with a fixed palette, so no per-frame quantization
+#
+# Command line:
+#   python -m fdtd1d.raster 2-3 -o FDTD-1D-2-3.gif
+
+# Imports
+import argparse
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from .scenarios import SCENARIOS, scenario
+from .stability import Unstable, Watchdog
+from .styles import style
+
+# Resolution and frame rate of the scripts' animations
+DPI = 100
+FPS = 15
+
+# Fixed palette: background, axes/material, Ex, Hz
+WHITE, BLACK, BLUE, RED = range(4)
+PALETTE = [255, 255, 255,
+           0, 0, 0,
+           0, 0, 255,
+           255, 0, 0] + [0, 0, 0]*252
+
+# Plot area as fractions of one panel (left, right, top, bottom)
+AREA = (0.09, 0.98, 0.08, 0.78)
+
+
+class RasterRenderer:
+    """Draws frames of a Style directly into a uint8 palette buffer.
+
+    The axes box, ticks, tick labels, material profile and static labels
+    are rasterized once into a background frame; every frame copies the
+    background and adds the field polylines and the 'T = n' label.
+    """
+
+    def __init__(self, st, material, k_max, linewidth=1.5):
+        self.st     = st
+        self.width  = int(st.figsize[0]*DPI)
+        self.height = int(st.figsize[1]*DPI)
+        self.half   = linewidth/2
+
+        # Plot area (pixels) of each panel
+        panel_h = self.height/len(st.panels)
+        self.areas = []
+        for i in range(len(st.panels)):
+            top = i*panel_h
+            self.areas.append((int(AREA[0]*self.width), int(AREA[1]*self.width),
+                               int(top + AREA[2]*panel_h), int(top + AREA[3]*panel_h)))
+
+        # Cell position of each pixel column of the plot area
+        x0, x1, y0, y1 = self.areas[0]
+        self.cells = (np.arange(x0, x1) - x0)/(x1 - x0 - 1)*st.xmax
+        self.rows  = [np.arange(a[2], a[3])[:, None] for a in self.areas]
+
+        self.background = np.full((self.height, self.width), WHITE, dtype=np.uint8)
+        self.frame_buffer = np.empty_like(self.background)
+        self._draw_axes()
+        if material is not None:
+            self._polyline(self.background, 0, material, BLACK, dashed=True)
+
+    def _pixel_y(self, panel, values):
+        # Data values to (fractional) pixel rows of a panel
+        lo, hi = self.st.ylim
+        _, _, y0, y1 = self.areas[panel]
+        return y0 + (hi - values)/(hi - lo)*(y1 - 1 - y0)
+
+    def _draw_axes(self):
+        image = Image.frombuffer('P', (self.width, self.height), self.background, 'raw', 'P', 0, 1)
+        image.readonly = False
+        draw  = ImageDraw.Draw(image)
+        st    = self.st
+        for panel, (x0, x1, y0, y1) in enumerate(self.areas):
+            draw.rectangle([x0 - 1, y0 - 1, x1, y1], outline=BLACK)
+            for x in np.arange(0, st.xmax + 1, step=20):
+                px = x0 + x/st.xmax*(x1 - x0 - 1)
+                draw.line([px, y1, px, y1 + 3], fill=BLACK)
+                if panel == len(self.areas) - 1:
+                    draw.text((px, y1 + 4), '{:g}'.format(x), fill=BLACK, anchor='ma')
+            for y in np.arange(st.yticks[0], st.yticks[1], step=st.yticks[2]):
+                py = self._pixel_y(panel, y)
+                draw.line([x0 - 4, py, x0 - 1, py], fill=BLACK)
+                draw.text((x0 - 6, py), '{:g}'.format(round(y, 6)), fill=BLACK, anchor='rm')
+            draw.text((4, (y0 + y1)/2), st.panels[panel], fill=BLACK, anchor='lm')
+        for x, y, text in st.labels:
+            draw.text(self._point(x, y), text.replace('$\\epsilon_r$', 'eps_r').replace('$\\sigma$', 'sigma'),
+                      fill=BLACK, anchor='mm')
+        self.background[:] = np.asarray(image)
+
+    def _point(self, x, y):
+        # Labels outside the axes (the 1g time label) are kept in the frame
+        x0, x1, _, _ = self.areas[0]
+        return x0 + x/self.st.xmax*(x1 - x0 - 1), min(self._pixel_y(0, y), self.height - 8)
+
+    def _polyline(self, buf, panel, values, colour, dashed=False):
+        # Line through (k, values[k]): for every pixel column fill the rows
+        # between its y and the next column's y, widened by half the width
+        x0, x1, y0, y1 = self.areas[panel]
+        y  = self._pixel_y(panel, np.interp(self.cells, np.arange(len(values)), values))
+        lo = np.minimum(y[:-1], y[1:]) - self.half
+        hi = np.maximum(y[:-1], y[1:]) + self.half
+        mask = (self.rows[panel] >= lo) & (self.rows[panel] <= hi)
+        if dashed:
+            mask[:, (np.arange(mask.shape[1]) // 6) % 2 == 1] = False
+        buf[y0:y1, x0:x1-1][mask] = colour
+
+    def frame(self, n, Ex, Hz=None):
+        buf = self.frame_buffer
+        buf[:] = self.background
+        self._polyline(buf, 0, Ex, BLUE)
+        if Hz is not None and len(self.areas) > 1:
+            self._polyline(buf, 1, Hz, RED)
+        image = Image.frombuffer('P', (self.width, self.height), buf, 'raw', 'P', 0, 1).copy()
+        ImageDraw.Draw(image).text(self._point(*self.st.time_text), 'T = {}'.format(n), fill=BLACK, anchor='mm')
+        image.putpalette(PALETTE)
+        return image
+
+
+def save_gif(sc, path, jit=None, watchdog=None):
+    """Run Scenario sc and write a NumPy-rasterized animation to path.
+
+    With a watchdog (fdtd1d.stability.Watchdog) a diverging run raises
+    Unstable before anything is written.
+    """
+    st       = style(sc)
+    sim      = sc.simulation
+    two      = len(st.panels) == 2
+    renderer = RasterRenderer(st, sc.material, sim.k_max)
+    images   = []
+
+    def capture(sim, n):
+        images.append(renderer.frame(n, sim.Ex, sim.Hz if two else None))
+
+    sim.run(callback=capture, every=st.every, jit=jit, watchdog=watchdog)
+    images[0].save(path, save_all=True, append_images=images[1:], duration=int(1000/FPS),
+                   loop=0, optimize=False)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fdtd1d.raster',
+                                     description='Run an FDTD-1D scenario and save a fast NumPy-rendered GIF.')
+    parser.add_argument('scenario', choices=SCENARIOS, metavar='scenario', help='script name, e.g. 2-3')
+    parser.add_argument('-o', '--output', help='GIF file (default FDTD-1D-<scenario>.gif)')
+    parser.add_argument('--watchdog', action='store_true', help='stop without writing if the run diverges')
+    args = parser.parse_args(argv)
+
+    path = args.output or 'FDTD-1D-{}.gif'.format(args.scenario)
+    try:
+        save_gif(scenario(args.scenario), path, watchdog=Watchdog() if args.watchdog else None)
+    except Unstable as error:
+        parser.exit(1, '{}: {}\n'.format(args.scenario, error))
+
+
+if __name__ == '__main__':
+    main()
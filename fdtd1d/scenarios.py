@@ -0,0 +1,167 @@
+# The FDTD-1D Basics and Flux notation scripts as Simulation set-ups
+# Scenario names follow the script names, e.g. '1e-iii' or '2-3'
+
+# Imports
+import numpy as np
+
+from .boundaries import AbsorbingBoundary, PECRegion
+from .constants import c_0, eps_0
+from .simulation import Simulation
+from .sources import GaussianPulse, ModulatedGaussian, SineWave, Source
+
+
+class Scenario:
+    """A ready-to-run Simulation together with its material profile.
+
+    material is the dashed profile drawn under Ex in the scripts (None
+    for the free space ones).
+    """
+
+    def __init__(self, name, simulation, material=None, **parameters):
+        self.name       = name
+        self.simulation = simulation
+        self.material   = material
+        self.parameters = parameters
+
+    @property
+    def n_max(self):
+        return self.simulation.n_max
+
+
+def free_space(name, n_max=400, factor=0.5, field='Ex', cells=(100,), absorbing=False, dtype=np.float64):
+    # FDTD-1D-1a to 1c: Gaussian hard source(s) in free space
+    k_max      = 200
+    sources    = [Source(k, GaussianPulse(), field=field, hard=True) for k in cells]
+    boundaries = []
+    if absorbing:
+        boundaries = [AbsorbingBoundary('lower'), AbsorbingBoundary('upper')]
+    sim = Simulation(k_max, n_max, cb=factor, courant=factor,
+                     sources=sources, boundaries=boundaries, dtype=dtype)
+    return Scenario(name, sim)
+
+
+def dielectric(name, waveform, k_max=200, n_max=800, k_source=5, eps_r=4,
+               hard=False, upper_delay=2, material_scale=None, dtype=np.float64):
+    # FDTD-1D-1d to 1f: dielectric filling the second half of the domain
+    c = np.ones(k_max)
+    c[:int(k_max/2)] = 0.5
+    c[int(k_max/2):] = 0.5/eps_r
+
+    material = np.zeros(k_max)
+    material[int(k_max/2):] = 1
+    if material_scale is not None:
+        material = material*material_scale[0] + material_scale[1]
+
+    sim = Simulation(k_max, n_max, cb=c,
+                     sources=[Source(k_source, waveform, hard=hard)],
+                     boundaries=[AbsorbingBoundary('lower'),
+                                 AbsorbingBoundary('upper', delay=upper_delay)],
+                     dtype=dtype)
+    return Scenario(name, sim, material, eps_r=eps_r)
+
+
+def lossy(name, freq, dy=None, eps_r=4, sigma=0.04, n_max=800, length=None,
+          flux=False, pec=None, k_max=200, k_source=5, dtype=np.float64):
+    # FDTD-1D-1g and Flux notation: lossy dielectric (or metal) slab
+    start    = int(k_max/2)
+    stop     = k_max if length is None else start + length
+
+    # Spatial and temporal step sizes
+    if dy is None:
+        lambda_min = (c_0/np.sqrt(eps_r))/freq
+        dy         = lambda_min/10
+    dt = dy/(2*c_0)
+
+    boundaries = [AbsorbingBoundary('lower'), AbsorbingBoundary('upper')]
+    if pec is not None:
+        boundaries.append(PECRegion(start, start + pec))
+    coefficients = {}
+    if flux:
+        const_a = np.zeros(k_max)
+        const_b = np.ones(k_max)
+        const_a[start:stop] = (sigma/eps_0)*dt
+        const_b[start:stop] = 1/(eps_r + (sigma/eps_0)*dt)
+        coefficients = dict(const_a=const_a, const_b=const_b)
+    elif pec is None:
+        eaf = (dt*sigma)/(2*eps_r*eps_0)
+        ca = np.ones(k_max)
+        ca[start:stop] = (1-eaf)/(1+eaf)
+        cb = np.ones(k_max)
+        cb[:] = 0.5
+        cb[start:stop] = 1/(2*eps_r*(1+eaf))
+        coefficients = dict(ca=ca, cb=cb)
+
+    source = Source(k_source, SineWave(freq, dt), field='Dx' if flux else 'Ex')
+    sim = Simulation(k_max, n_max, sources=[source], boundaries=boundaries, dtype=dtype, **coefficients)
+
+    # Material height across domain: air + some material
+    material = np.zeros(k_max)
+    material[start:stop] = 1.5
+    if length is not None:
+        material = material*2 - (2 if flux else 1.5)
+    return Scenario(name, sim, material, freq=freq, dy=dy, dt=dt, eps_r=eps_r, sigma=sigma)
+
+
+def _sine(freq, dy=0.01):
+    return SineWave(freq, dy/(2*c_0))
+
+
+def _cell_size(scale, eps_r=20, freq=3e9):
+    # FDTD-1D-1f: cell size as a multiple of the lambda_min/10 rule of thumb
+    lambda_min = (c_0/np.sqrt(eps_r))/freq
+    dy         = (lambda_min/10)*scale
+    return SineWave(freq, dy/(2*c_0))
+
+
+def _resolution(name, scale, **options):
+    # FDTD-1D-1f: sine source in eps_r = 20 at a given cell size
+    return dielectric(name, _cell_size(scale), n_max=1600, eps_r=20, material_scale=(4, -2), **options)
+
+
+_BUILDERS = {
+    '1a-i':   lambda **options: free_space('1a-i', **options),
+    '1a-ii':  lambda **options: free_space('1a-ii', n_max=800, cells=(150, 50), **options),
+    '1a-iii': lambda **options: free_space('1a-iii', field='Hz', **options),
+    '1a-iv':  lambda **options: free_space('1a-iv', n_max=800, field='Hz', cells=(150, 50), **options),
+    '1b-i':   lambda **options: free_space('1b-i', factor=1.0, **options),
+    '1b-ii':  lambda **options: free_space('1b-ii', factor=1.1, **options),
+    '1b-iii': lambda **options: free_space('1b-iii', factor=0.25, **options),
+    '1c-i':   lambda **options: free_space('1c-i', absorbing=True, **options),
+    '1c-ii':  lambda **options: free_space('1c-ii', absorbing=True, **options),
+    '1d-i':   lambda **options: dielectric('1d-i', GaussianPulse(), k_source=10, hard=True, **options),
+    '1d-ii':  lambda **options: dielectric('1d-ii', GaussianPulse(), k_source=10, hard=True, upper_delay=4, **options),
+    '1d-iii': lambda **options: dielectric('1d-iii', GaussianPulse(), k_source=10, upper_delay=4, **options),
+    '1e-i':   lambda **options: dielectric('1e-i', _sine(700e6), upper_delay=4, **options),
+    '1e-ii':  lambda **options: dielectric('1e-ii', _sine(700e6), **options),
+    '1e-iii': lambda **options: dielectric('1e-iii', _sine(1e9), **options),
+    '1e-iv':  lambda **options: dielectric('1e-iv', _sine(1.3e9), **options),
+    '1e-v':   lambda **options: dielectric('1e-v', _sine(1.6e9), **options),
+    '1e-vi':  lambda **options: dielectric('1e-vi', _sine(1.9e9), **options),
+    '1e-vii': lambda **options: dielectric('1e-vii', ModulatedGaussian(50e9, 0.001/(2*c_0)), k_max=400, **options),
+    '1f-i':   lambda **options: _resolution('1f-i', 1, **options),
+    '1f-ii':  lambda **options: _resolution('1f-ii', 2, **options),
+    '1f-iii': lambda **options: _resolution('1f-iii', 0.5, **options),
+    '1f-iv':  lambda **options: _resolution('1f-iv', 10, **options),
+    '1f-v':   lambda **options: _resolution('1f-v', 0.1, **options),
+    '1g-i':   lambda **options: lossy('1g-i', 700e6, dy=0.01, **options),
+    '1g-ii':  lambda **options: lossy('1g-ii', 250e6, length=50, **options),
+    '1g-iii': lambda **options: lossy('1g-iii', 250e6, eps_r=1, sigma=1e6, length=50, **options),
+    '1g-iv':  lambda **options: lossy('1g-iv', 250e6, eps_r=1, sigma=1e6, length=50, pec=25, **options),
+    '2-1':    lambda **options: lossy('2-1', 700e6, **options),
+    '2-2':    lambda **options: lossy('2-2', 700e6, flux=True, **options),
+    '2-3':    lambda **options: lossy('2-3', 700e6, n_max=1600, length=40, flux=True, **options),
+}
+
+SCENARIOS = tuple(_BUILDERS)
+
+
+def scenario(name, dtype=np.float64):
+    """Build a fresh Scenario by script name, e.g. scenario('1g-ii').
+
+    dtype=np.float32 stores the fields in single precision (see Simulation).
+    """
+    try:
+        builder = _BUILDERS[name]
+    except KeyError:
+        raise KeyError('unknown scenario {!r}; choose from {}'.format(name, ', '.join(SCENARIOS))) from None
+    return builder(dtype=dtype)
@@ -0,0 +1,34 @@
+# Material compiler: splits the grid into homogeneous segments
+# Most cells share one of a few coefficient values (0.5 in air, one value
+# inside a slab), so the E update can run segment by segment with scalar
+# coefficients instead of multiplying by full-length coefficient arrays
+
+# Imports
+import numpy as np
+
+# Profiles that split into more segments than this (e.g. graded ones), or
+# into segments shorter than MIN_LENGTH cells on average, keep the per-cell
+# coefficient arrays: the per-segment overhead would outweigh the savings
+MAX_SEGMENTS = 8
+MIN_LENGTH   = 256
+
+
+def segments(coefficients, start=1, stop=None, max_segments=MAX_SEGMENTS, min_length=MIN_LENGTH):
+    """Split cells start .. stop-1 into runs where all coefficients are constant.
+
+    coefficients is a sequence of equally long arrays. Returns a list of
+    (lo, hi, values) with values the tuple of scalar coefficients (in the
+    dtype of each array) on cells lo .. hi-1, or None if there would be
+    more than max_segments segments or fewer than min_length cells per
+    segment. A single cell between two materials (an averaged interface
+    cell) becomes a segment of its own.
+    """
+    stacked = np.array(coefficients, dtype=float)[:, start:stop]
+    if stacked.shape[1] == 0:
+        return []
+    change = np.flatnonzero(np.any(stacked[:, 1:] != stacked[:, :-1], axis=0)) + 1
+    if len(change) + 1 > min(max_segments, stacked.shape[1] // min_length):
+        return None
+    edges = [0] + change.tolist() + [stacked.shape[1]]
+    return [(start + a, start + b, tuple(coefficient[start + a] for coefficient in coefficients))
+            for a, b in zip(edges[:-1], edges[1:])]
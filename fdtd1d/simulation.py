@@ -0,0 +1,322 @@
+# Reusable 1-D FDTD engine
+# Vector (slice) notation for every update, as in FDTD-1D-2-1
+
+# Imports
+import numpy as np
+
+from . import checkpoint as _checkpoint
+from . import jit as _jit
+from .segments import segments as _segments
+
+# Active-region tracking: the region is shrunk to the cells above the
+# threshold every SHRINK_EVERY steps, and snaps to a domain edge once it
+# comes within EDGE_MARGIN cells of it (plus the thickness of a CPML)
+SHRINK_EVERY = 32
+EDGE_MARGIN  = 3
+
+
+class Simulation:
+    """Leapfrog FDTD simulation of Ex and Hz on a 1-D grid.
+
+    Two update forms are supported:
+
+    - basic notation (FDTD-1D Basics, FDTD-1D-2-1):
+      Ex = ca*Ex + cb*(Hz[k] - Hz[k-1]); ca defaults to 1, cb to courant
+    - flux notation (FDTD-1D-2-2, 2-3), chosen when const_b is given:
+      Dx = Dx + courant*(Hz[k] - Hz[k-1]); Ex = const_b*(Dx - ix);
+      ix = ix + const_a*Ex
+
+    Each step runs the E update, the E/Dx sources, the boundaries, the H
+    update and finally the Hz sources, in the same order as the scripts.
+    Monitors (e.g. DFTMonitor) then record the fields of the finished step.
+
+    With track=True only the active region [lo, hi) of cells where Ex or
+    Hz can be nonzero is updated. It starts at the source cells, widens by
+    one cell per update and every SHRINK_EVERY steps shrinks to the cells
+    where |Ex| or |Hz| exceeds threshold; the fields outside are set to 0.
+    threshold=0 gives exactly the same fields as the full update.
+    Tracking assumes the fields only change through step(); set
+    sim.region = [0, k_max] after editing them by hand.
+
+    On large grids reset() splits the coefficients into homogeneous
+    segments (fdtd1d.segments) that are updated with scalar factors;
+    call reset() again after changing the coefficient arrays. In flux
+    notation ix is taken to stay zero where const_a = 0.
+
+    dtype=np.float32 stores Ex, Hz, Dx and the ca, cb and const_b
+    coefficients in single precision, halving the memory traffic of the
+    update; the conduction accumulator ix, const_a and the DFT monitors
+    stay in double precision.
+    """
+
+    def __init__(self, k_max, n_max, ca=None, cb=None, const_a=None, const_b=None,
+                 courant=0.5, sources=(), boundaries=(), monitors=(), track=False, threshold=0.0,
+                 dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.float64):
+            raise ValueError('dtype must be float32 or float64, got {}'.format(self.dtype))
+        self.k_max     = k_max
+        self.n_max     = n_max
+        self.courant   = courant
+        self.track     = track
+        self.threshold = threshold
+
+        # Constants in update equations
+        self.flux = const_b is not None
+        if self.flux:
+            if ca is not None or cb is not None:
+                raise ValueError('ca/cb and const_a/const_b cannot be combined')
+            self.const_b = _coefficient(const_b, k_max, 'const_b', self.dtype)
+            self.const_a = _coefficient(0.0 if const_a is None else const_a, k_max, 'const_a')
+        else:
+            if const_a is not None:
+                raise ValueError('const_a requires const_b')
+            self.ca = None if ca is None else _coefficient(ca, k_max, 'ca', self.dtype)
+            self.cb = _coefficient(courant if cb is None else cb, k_max, 'cb', self.dtype)
+
+        self.sources    = list(sources)
+        self.boundaries = list(boundaries)
+        self.monitors   = list(monitors)
+        self.reset()
+
+    def reset(self):
+        # Electric and magnetic fields (wave propagates in y-direction)
+        self.Ex = np.zeros(self.k_max, dtype=self.dtype)
+        self.Hz = np.zeros(self.k_max, dtype=self.dtype)
+        # Electric displacement field and summation (flux notation only);
+        # the summation always accumulates in double precision
+        self.Dx = np.zeros(self.k_max, dtype=self.dtype)
+        self.ix = np.zeros(self.k_max)
+        self.n  = 0
+        # Scratch buffers for the terms of the in-place updates (the second
+        # one, for the ix term, is double precision)
+        self._scratch = np.empty(self.k_max, dtype=self.dtype)
+        self._scratch_ix = self._scratch if self.dtype == np.float64 else np.empty(self.k_max)
+        for boundary in self.boundaries:
+            boundary.bind(self)
+        # Boundaries that also act after the H update (CPML, PMC, periodic)
+        self._magnetic = [b for b in self.boundaries if hasattr(b, 'apply_magnetic')]
+        for monitor in self.monitors:
+            monitor.bind(self)
+
+        # Homogeneous segments of the E update coefficients (None when the
+        # profile has too many), as (lo, hi, (ca or const_a, cb or const_b))
+        if self.flux:
+            self._segments = _segments([self.const_a, self.const_b])
+        else:
+            self._segments = _segments([np.ones(self.k_max, dtype=self.dtype) if self.ca is None else self.ca, self.cb])
+
+        # Active region [lo, hi), empty until a source fires. A periodic
+        # domain has no edges to snap to, so it is always updated in full
+        self.region = [self.k_max, 0]
+        self._margin       = EDGE_MARGIN + max([getattr(b, 'thickness', 0) for b in self.boundaries], default=0)
+        self._shrink_every = SHRINK_EVERY
+        if not self.track or any(getattr(b, 'periodic', False) for b in self.boundaries):
+            self.region = [0, self.k_max]
+
+    def _grow(self):
+        # Add the source cells and snap to nearby edges; returns the cells
+        # [e0, e1) of the E update and [h0, h1) of the H update
+        lo, hi = self.region
+        for source in self.sources:
+            if source.active(self.n):
+                lo, hi = min(lo, source.cell), max(hi, source.cell + 1)
+        if lo >= hi:
+            self.region = [lo, hi]
+            return 1, 1, 0, 0
+        if lo <= self._margin:
+            lo = 0
+        if hi >= self.k_max - self._margin:
+            hi = self.k_max
+        e0, e1 = max(lo, 1), min(hi + 1, self.k_max)
+        h0, h1 = max(lo - 1, 0), min(e1, self.k_max - 1)
+        self.region = [h0, e1]
+        return e0, e1, h0, h1
+
+    def _shrink(self):
+        # Cut the region down to the cells above threshold; a region that
+        # reached an edge keeps it, since edge boundaries may hold state
+        lo, hi = self.region
+        if lo >= hi or (lo == 0 and hi == self.k_max):
+            return
+        Ex, Hz = self.Ex, self.Hz
+        above  = np.flatnonzero((np.abs(Ex[lo:hi]) > self.threshold) | (np.abs(Hz[lo:hi]) > self.threshold))
+        if len(above):
+            new_lo = 0 if lo == 0 else lo + int(above[0])
+            new_hi = self.k_max if hi == self.k_max else lo + int(above[-1]) + 1
+        elif lo == 0:
+            new_lo, new_hi = 0, min(hi, self._margin + 1)
+        elif hi == self.k_max:
+            new_lo, new_hi = max(lo, self.k_max - self._margin - 1), self.k_max
+        else:
+            new_lo, new_hi = self.k_max, 0
+        for F in (Ex, Hz):
+            F[lo:max(lo, min(new_lo, hi))] = 0
+            F[max(new_hi, lo):hi] = 0
+        self.region = [new_lo, new_hi]
+
+    def step(self):
+        n     = self.n
+        k_max = self.k_max
+        if self.track:
+            e0, e1, h0, h1 = self._grow()
+        else:
+            e0, e1, h0, h1 = 1, k_max, 0, k_max-1
+
+        # Update electric field
+        self._update_electric(e0, e1)
+
+        # Electric field sources
+        for source in self.sources:
+            if source.field != 'Hz':
+                source.inject(self, n)
+
+        # Boundary conditions
+        for boundary in self.boundaries:
+            boundary.apply(self, n)
+
+        # Update magnetic field
+        self._update_magnetic(h0, h1)
+        for boundary in self._magnetic:
+            boundary.apply_magnetic(self, n)
+
+        # Magnetic field sources
+        for source in self.sources:
+            if source.field == 'Hz':
+                source.inject(self, n)
+
+        # Monitors see the fields at the end of the step
+        for monitor in self.monitors:
+            monitor.record(self, n)
+
+        self.n = n + 1
+        if self.track and self.n % self._shrink_every == 0:
+            self._shrink()
+
+    def _update_electric(self, e0, e1):
+        # E (and Dx, ix) update of cells e0 .. e1-1, in place: every term
+        # goes through the scratch buffer d, so no temporary arrays are made
+        Ex, Hz = self.Ex, self.Hz
+        d = self._scratch[e0:e1]
+        E = Ex[e0:e1]
+        np.subtract(Hz[e0:e1], Hz[e0-1:e1-1], out=d)
+        if self._segments is not None:
+            self._update_segments(e0, e1, d)
+        elif self.flux:
+            D, I = self.Dx[e0:e1], self.ix[e0:e1]
+            np.multiply(d, self.courant, out=d)
+            np.add(D, d, out=D)
+            np.subtract(D, I, out=E)
+            np.multiply(self.const_b[e0:e1], E, out=E)
+            t = self._scratch_ix[e0:e1]
+            np.multiply(self.const_a[e0:e1], E, out=t)
+            np.add(I, t, out=I)
+        elif self.ca is None:
+            np.multiply(self.cb[e0:e1], d, out=d)
+            np.add(E, d, out=E)
+        else:
+            np.multiply(self.cb[e0:e1], d, out=d)
+            np.multiply(self.ca[e0:e1], E, out=E)
+            np.add(E, d, out=E)
+
+    def _update_magnetic(self, h0, h1):
+        # Hz update of cells h0 .. h1-1, in place like _update_electric
+        Ex, Hz = self.Ex, self.Hz
+        d = self._scratch[h0:h1]
+        np.subtract(Ex[h0+1:h1+1], Ex[h0:h1], out=d)
+        np.multiply(d, self.courant, out=d)
+        np.add(Hz[h0:h1], d, out=Hz[h0:h1])
+
+    def _update_segments(self, e0, e1, d):
+        # The E update of step() with one scalar coefficient pair per
+        # segment; a factor of 1 and an ix term where const_a = 0 (ix stays
+        # zero there) are skipped, which leaves the result unchanged. d
+        # holds the curl of Hz on e0 .. e1-1 and is overwritten
+        Ex = self.Ex
+        if self.flux:
+            Dx, ix = self.Dx, self.ix
+            np.multiply(d, self.courant, out=d)
+            np.add(Dx[e0:e1], d, out=Dx[e0:e1])
+        for lo, hi, (c1, c2) in self._segments:
+            lo, hi = max(lo, e0), min(hi, e1)
+            if lo >= hi:
+                continue
+            E, t = Ex[lo:hi], d[lo - e0:hi - e0]
+            if self.flux and c1 == 0:
+                np.multiply(Dx[lo:hi], c2, out=E)
+            elif self.flux:
+                I, t = ix[lo:hi], self._scratch_ix[lo:hi]
+                np.subtract(Dx[lo:hi], I, out=E)
+                np.multiply(E, c2, out=E)
+                np.multiply(E, c1, out=t)
+                np.add(I, t, out=I)
+            else:
+                np.multiply(t, c2, out=t)
+                if c1 != 1:
+                    np.multiply(E, c1, out=E)
+                np.add(E, t, out=E)
+
+    def run(self, n_steps=None, callback=None, every=1, jit=None, checkpoint=None, checkpoint_every=None,
+            watchdog=None):
+        """Advance n_steps time steps (default: up to n_max).
+
+        callback(sim, n) is called after every `every`-th step, where n is
+        the index of the step just taken (like the `n % 5 == 0` plotting).
+
+        jit=None uses the compiled Numba kernel when numba is installed and
+        every source and boundary is supported, jit=True requires it and
+        jit=False always uses the NumPy step. Between callbacks the compiled
+        kernel runs all time steps in a single call.
+
+        With checkpoint (a file name) and checkpoint_every, the full state
+        is saved after every checkpoint_every-th step and at the end of the
+        run; fdtd1d.checkpoint.resume(sim, checkpoint) continues from it.
+
+        watchdog (an fdtd1d.stability.Watchdog) checks the Courant number
+        before the first step and the field energy every watchdog.every
+        steps, and raises fdtd1d.stability.Unstable as soon as the run
+        diverges.
+        """
+        if checkpoint_every and checkpoint is None:
+            raise ValueError('checkpoint_every needs a checkpoint file name')
+        if n_steps is None:
+            n_steps = self.n_max - self.n
+        compiled = _jit.use_jit(self, jit)
+        if watchdog is not None:
+            watchdog.start(self)
+        n_stop   = self.n + n_steps
+        while self.n < n_stop:
+            n = self.n
+            if callback is None:
+                chunk = n_stop - n
+            else:
+                # Run up to and including the next step that is captured
+                chunk = min(n + (-n) % every + 1, n_stop) - n
+            if checkpoint_every:
+                chunk = min(chunk, checkpoint_every - n % checkpoint_every)
+            if watchdog is not None:
+                chunk = min(chunk, watchdog.every - n % watchdog.every)
+            if compiled:
+                _jit.advance(self, chunk)
+            else:
+                for _ in range(chunk):
+                    self.step()
+            if watchdog is not None and self.n % watchdog.every == 0:
+                watchdog.check(self)
+            if callback is not None and (self.n - 1) % every == 0:
+                callback(self, self.n - 1)
+            if checkpoint_every and self.n % checkpoint_every == 0 and self.n < n_stop:
+                _checkpoint.save(self, checkpoint)
+        if checkpoint is not None:
+            _checkpoint.save(self, checkpoint)
+        return self
+
+
+def _coefficient(value, k_max, name, dtype=np.float64):
+    # Broadcast a scalar or check the length of a coefficient array
+    array = np.asarray(value, dtype=dtype)
+    if array.ndim == 0:
+        return np.full(k_max, array, dtype=dtype)
+    if array.shape != (k_max,):
+        raise ValueError('{} must have shape ({},), got {}'.format(name, k_max, array.shape))
+    return array
@@ -0,0 +1,183 @@
+# Electric and magnetic field sources
+# Waveforms take integer time steps (scalar or array) and return the source
+# values; pulses can end, after which they are exactly 0
+
+# Imports
+import numpy as np
+
+
+# Source values are tabulated this many time steps at a time
+BLOCK = 4096
+
+# Phasor recurrences are re-anchored every ANCHOR time steps
+ANCHOR = 64
+
+
+def _cutoff(t_0, spread, tolerance):
+    # First time step after the peak where the Gaussian envelope is below
+    # tolerance; None keeps the pulse running for the whole simulation
+    if tolerance is None:
+        return None
+    return int(np.ceil(t_0 + spread*np.sqrt(-2*np.log(tolerance))))
+
+
+class GaussianPulse:
+    """Gaussian pulse used by the FDTD-1D-1a to 1d scripts.
+
+    With a tolerance the pulse is cut off (exactly 0) from time step
+    `end` on, where its envelope has fallen below tolerance.
+    """
+
+    def __init__(self, spread=12, t_0=None, tolerance=None):
+        self.spread = spread                                # Width of Gaussian pulse
+        self.t_0    = spread*3 if t_0 is None else t_0      # Delay (offset of Gaussian pulse)
+        self.end    = _cutoff(self.t_0, spread, tolerance)
+
+    def __call__(self, t):
+        pulse = np.exp(-0.5 * ((self.t_0 - t) / self.spread) ** 2)
+        return pulse if self.end is None else np.where(t < self.end, pulse, 0.0)
+
+    def table(self, n0, n1):
+        return _pulse_table(self, n0, n1)
+
+
+class SineWave:
+    """Continuous sine wave of frequency freq sampled every dt seconds.
+
+    With recurrence=True tables are built by rotating a phasor instead of
+    calling np.sin per sample: exp(j*w_0*dt*n) is computed directly only
+    at every ANCHOR-th step a and the steps in between are a multiple of
+    it by the fixed rotations exp(j*w_0*dt*(n - a)). Each value depends
+    only on n, so tables of any range agree exactly (e.g. after a restart).
+    The result agrees with np.sin to within the rounding of the phase, but
+    is not bit-identical to the scripts.
+    """
+
+    def __init__(self, freq, dt, recurrence=False):
+        self.freq = freq
+        self.dt   = dt
+        self.w_0  = 2*np.pi*freq
+        self.recurrence = recurrence
+        self.end  = None
+
+    def __call__(self, t):
+        return np.sin(self.w_0*t*self.dt)
+
+    def table(self, n0, n1):
+        if not self.recurrence:
+            return self(np.arange(n0, n1))
+        phase     = self.w_0*self.dt
+        a0        = n0 - n0 % ANCHOR
+        anchors   = np.exp(1j*phase*np.arange(a0, n1, ANCHOR))
+        rotations = np.exp(1j*phase*np.arange(ANCHOR))
+        phasor    = np.multiply.outer(anchors, rotations).reshape(-1)
+        return phasor[n0 - a0:n1 - a0].imag
+
+
+class ModulatedGaussian:
+    """Wave packet: sine wave inside a Gaussian envelope (FDTD-1D-1e-vii).
+
+    tolerance cuts the packet off like GaussianPulse.
+    """
+
+    def __init__(self, freq, dt, spread=12, t_0=None, tolerance=None):
+        self.freq   = freq
+        self.dt     = dt
+        self.w_0    = 2*np.pi*freq
+        self.spread = spread
+        self.t_0    = spread*3 if t_0 is None else t_0
+        self.end    = _cutoff(self.t_0, spread, tolerance)
+
+    def __call__(self, t):
+        pulse = np.exp(-0.5 * ((self.t_0 - t) / self.spread) ** 2)*np.sin(self.w_0*t*self.dt)
+        return pulse if self.end is None else np.where(t < self.end, pulse, 0.0)
+
+    def table(self, n0, n1):
+        return _pulse_table(self, n0, n1)
+
+
+def _pulse_table(waveform, n0, n1):
+    # Only the steps before the cut-off are evaluated, the rest are 0
+    if waveform.end is None:
+        return waveform(np.arange(n0, n1))
+    values = np.zeros(n1 - n0)
+    stop   = min(max(waveform.end, n0), n1)
+    values[:stop - n0] = waveform(np.arange(n0, stop))
+    return values
+
+
+def tabulate(waveform, n0, n1):
+    """Values of waveform for time steps n0 .. n1-1 as an array.
+
+    Uses waveform.table when the waveform has one, otherwise calls it on
+    the whole range, so any vectorized callable can be a waveform.
+    """
+    table = getattr(waveform, 'table', None)
+    if table is not None:
+        return table(n0, n1)
+    return waveform(np.arange(n0, n1))
+
+
+class Source:
+    """Point source injecting a waveform into one cell of a field.
+
+    field is 'Ex', 'Dx' (flux notation) or 'Hz'. A hard source overwrites
+    the cell, a soft source adds to it so reflected waves pass through.
+
+    The waveform is tabulated BLOCK time steps at a time rather than
+    evaluated every step. Once a pulse has ended (waveform.end) a soft
+    source stops injecting; a hard source keeps holding its cell at 0.
+    """
+
+    def __init__(self, cell, waveform, field='Ex', hard=False):
+        if field not in ('Ex', 'Dx', 'Hz'):
+            raise ValueError("field must be 'Ex', 'Dx' or 'Hz', got {!r}".format(field))
+        self.cell     = cell
+        self.waveform = waveform
+        self.field    = field
+        self.hard     = hard
+
+    @property
+    def waveform(self):
+        return self._waveform
+
+    @waveform.setter
+    def waveform(self, waveform):
+        # A new waveform invalidates the tabulated block
+        self._waveform = waveform
+        self._start    = 0
+        self._values   = np.empty(0)
+
+    @property
+    def end(self):
+        """First time step from which the waveform is 0 (None: never)."""
+        return getattr(self.waveform, 'end', None)
+
+    def active(self, n):
+        # A soft source has nothing left to add after the pulse
+        return self.hard or self.end is None or n < self.end
+
+    def inject(self, sim, n):
+        if not self.active(n):
+            return
+        j = n - self._start
+        if not 0 <= j < len(self._values):
+            self._start, self._values, j = n, tabulate(self.waveform, n, n + BLOCK), 0
+        F     = getattr(sim, self.field)
+        pulse = self._values[j]
+        if self.hard:
+            F[self.cell] = pulse
+        else:
+            F[self.cell] = pulse + F[self.cell]
+
+
+def waveform_table(sources, n0, n1):
+    """Values of every source waveform for time steps n0 .. n1-1.
+
+    Returns an array of shape (len(sources), n1 - n0), evaluating each
+    waveform once on the whole range instead of once per time step.
+    """
+    values = np.empty((len(sources), n1 - n0))
+    for i, source in enumerate(sources):
+        values[i] = tabulate(source.waveform, n0, n1)
+    return values
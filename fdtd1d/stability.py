@@ -0,0 +1,128 @@
+# Stability checks: a Courant (CFL) check of the update coefficients before
+# a run and a cheap energy/NaN watchdog during it, so that a set-up like
+# FDTD-1D-1b-ii (update factor 1.1) stops after a few dozen steps instead
+# of running to n_max
+
+# Imports
+import numpy as np
+
+from .sources import tabulate
+
+# Default watchdog settings: the field energy is sampled every EVERY steps
+# and growth counts as exponential once it multiplies by at least GROWTH
+# on PATIENCE samples in a row while its rate falls by less than SLOWDOWN.
+# The energy is taken relative to the energy the sources have injected so
+# far, so the rising edge of a wide pulse does not count as growth
+EVERY    = 16
+GROWTH   = 2.0
+PATIENCE = 3
+SLOWDOWN = 0.9
+
+
+class Unstable(RuntimeError):
+    """Raised when a simulation is (or is about to become) unstable.
+
+    n        time step at which the problem was found
+    reason   'courant', 'nan' or 'growth'
+    energy   sampled field energies up to n (empty for 'courant')
+    """
+
+    def __init__(self, message, n, reason, energy=()):
+        super().__init__(message)
+        self.n      = n
+        self.reason = reason
+        self.energy = np.asarray(energy, dtype=float)
+
+
+def courant_numbers(sim):
+    """Per-cell stability number of the update coefficients of sim.
+
+    The leapfrog update is stable where the product of the E update factor
+    (cb, or courant*const_b in flux notation) and the H update factor
+    (courant) is at most 1, i.e. the local Courant number
+    sqrt(cb*courant) <= 1, and |ca| <= 1. Returns the larger of the two
+    conditions per cell, so any value above 1 is unstable.
+    """
+    if sim.flux:
+        factor = sim.courant*sim.const_b
+        decay  = np.ones(sim.k_max)
+    else:
+        factor = sim.cb
+        decay  = np.ones(sim.k_max) if sim.ca is None else np.abs(sim.ca)
+    return np.maximum(np.sqrt(np.abs(factor*sim.courant)), decay)
+
+
+def check_courant(sim):
+    """Raise Unstable if the coefficients of sim violate the Courant limit."""
+    numbers = courant_numbers(sim)
+    worst   = int(np.argmax(numbers))
+    # Allow for rounding in coefficients computed at exactly the limit
+    if numbers[worst] > 1 + 1e-12:
+        raise Unstable('Courant number {:.4g} > 1 at cell {} (courant={}, {}): the run would diverge'.format(
+            numbers[worst], worst, sim.courant, _coefficient_text(sim, worst)), sim.n, 'courant')
+
+
+def _coefficient_text(sim, k):
+    if sim.flux:
+        return 'const_b={:.4g}'.format(sim.const_b[k])
+    text = 'cb={:.4g}'.format(sim.cb[k])
+    if sim.ca is not None:
+        text += ', ca={:.4g}'.format(sim.ca[k])
+    return text
+
+
+class Watchdog:
+    """Energy and NaN/Inf monitor for Simulation.run(watchdog=...).
+
+    start() runs the Courant check; check() is called every `every` steps
+    and raises Unstable when the field energy sum(Ex**2 + Hz**2) is not
+    finite or has grown by at least `growth` times on `patience`
+    consecutive samples at a steady or rising rate. The energy is divided
+    by the sum of the squared source values injected so far: a stable
+    field grows with what the sources put in, however fast that rises,
+    while an unstable one keeps growing after the sources have slowed or
+    stopped.
+    """
+
+    def __init__(self, every=EVERY, growth=GROWTH, patience=PATIENCE, courant=True):
+        if every < 1:
+            raise ValueError('every must be at least 1, got {}'.format(every))
+        self.every    = every
+        self.growth   = growth
+        self.patience = patience
+        self.courant  = courant
+        self.energy   = []
+        self.injected = []
+
+    def start(self, sim):
+        self.energy   = []
+        self.injected = []
+        self._n       = sim.n
+        self._total   = 0.0
+        if self.courant:
+            check_courant(sim)
+
+    def check(self, sim):
+        with np.errstate(over='ignore', invalid='ignore'):
+            energy = float(np.dot(sim.Ex, sim.Ex) + np.dot(sim.Hz, sim.Hz))
+        self.energy.append(energy)
+        if not np.isfinite(energy):
+            raise Unstable('field is not finite at time step {}'.format(sim.n), sim.n, 'nan', self.energy)
+        for source in sim.sources:
+            values       = tabulate(source.waveform, self._n, sim.n)
+            self._total += float(np.dot(values, values))
+        self._n = sim.n
+        self.injected.append(self._total)
+
+        # Log growth rate per sample over the last patience + 1 samples,
+        # relative to the injected energy once there is any
+        recent   = np.array(self.energy[-self.patience - 1:])
+        injected = np.array(self.injected[-self.patience - 1:])
+        if len(recent) <= self.patience or np.any(recent <= 0):
+            return
+        if np.all(injected > 0):
+            recent = recent/injected
+        rates = np.diff(np.log(recent))
+        if np.all(rates >= np.log(self.growth)) and np.all(rates[1:] >= SLOWDOWN*rates[:-1]):
+            raise Unstable('field energy grows exponentially ({:.3g} times per {} steps) at time step {}'.format(
+                np.exp(rates[-1]), self.every, sim.n), sim.n, 'growth', self.energy)
@@ -0,0 +1,115 @@
+# Steady-state detection for CW runs
+# Stops a sine-source run once the field phasors stop changing from one
+# window of periods to the next, instead of running to a hand-picked n_max
+#
+# Command line:
+#   python -m fdtd1d.steady 1e-iii --tolerance 1e-3
+
+# Imports
+import argparse
+
+import numpy as np
+
+from .broadband import Response
+from .monitors import DFTMonitor
+from .scenarios import SCENARIOS, scenario
+
+
+class SteadyState(Response):
+    """Converged phasors of a CW run (a one-frequency Response).
+
+    converged   True if the tolerance was met before max_steps
+    n           time step at which the run stopped
+    changes     relative phasor change after each window
+    """
+
+    def __init__(self, freq, cells, dt, phasor, converged, n, changes):
+        super().__init__(np.array([freq]), cells, dt, phasor[:, None])
+        self.phasor    = phasor
+        self.converged = converged
+        self.n         = n
+        self.changes   = changes
+
+
+def _fit(sums, total, steps, w, dt, field):
+    # Least-squares a*cos + b*sin + offset over the window from the sums
+    # of F*exp(-j*w*t) and of F; exact for a sinusoid on a constant
+    # offset (the slowly decaying static part a soft source leaves)
+    # even when the window is not a whole number of periods
+    t = (steps + (0.5 if field == 'Hz' else 0.0))*dt
+    basis = np.array([np.cos(w*t), np.sin(w*t), np.ones_like(t)])
+    gram  = basis @ basis.T
+    a, b, _ = np.linalg.solve(gram, np.array([sums.real, -sums.imag, total.real]))
+    # F = Im(H exp(j*w*t)) = Re(H)*sin + Im(H)*cos
+    return b + 1j*a
+
+
+def run_steady(sim, freq=None, dt=None, cells=None, tolerance=1e-3, periods=2, max_steps=None,
+               field='Ex', jit=None):
+    """Run the CW simulation sim until its field is periodic.
+
+    Every window of `periods` source periods the phasor of field at cells
+    (default: all) is fitted; the run stops when it changes by less than
+    tolerance (relative to its largest magnitude) from the previous window,
+    or after max_steps (default: up to n_max). freq and dt default to those
+    of the first SineWave source. Returns a SteadyState.
+    """
+    if freq is None or dt is None:
+        waveform = sim.sources[0].waveform if sim.sources else None
+        freq = getattr(waveform, 'freq', None) if freq is None else freq
+        dt   = getattr(waveform, 'dt', None) if dt is None else dt
+        if freq is None or dt is None:
+            raise ValueError('freq and dt are needed when the first source has none')
+    if max_steps is None:
+        max_steps = sim.n_max - sim.n
+    cells  = np.arange(sim.k_max) if cells is None else np.atleast_1d(np.asarray(cells, dtype=int))
+    w      = 2*np.pi*freq
+    window = max(2, int(round(periods/(freq*dt))))
+
+    monitor = DFTMonitor(cells, [freq, 0.0], dt, fields=(field,))
+    monitor.bind(sim)
+    sim.monitors.append(monitor)
+    try:
+        n_stop    = sim.n + max_steps
+        previous  = None
+        phasor    = np.zeros(len(cells), dtype=complex)
+        changes   = []
+        converged = False
+        while sim.n + window <= n_stop:
+            before = monitor.spectrum(field).copy()
+            steps  = np.arange(sim.n, sim.n + window)
+            sim.run(window, jit=jit)
+            sums   = monitor.spectrum(field) - before
+            phasor = _fit(sums[:, 0], sums[:, 1], steps, w, dt, field)
+            if previous is not None:
+                scale = max(np.abs(phasor).max(), np.finfo(float).tiny)
+                changes.append(np.abs(phasor - previous).max()/scale)
+                if changes[-1] < tolerance:
+                    converged = True
+                    break
+            previous = phasor
+    finally:
+        sim.monitors.remove(monitor)
+    return SteadyState(freq, cells, dt, phasor, converged, sim.n, np.array(changes))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fdtd1d.steady',
+                                     description='Run a CW FDTD-1D scenario until its field is periodic.')
+    parser.add_argument('scenario', choices=SCENARIOS, metavar='scenario', help='script name, e.g. 1e-iii')
+    parser.add_argument('--tolerance', type=float, default=1e-3, help='relative phasor change between windows')
+    parser.add_argument('--periods', type=int, default=2, help='source periods per window')
+    parser.add_argument('--max-steps', type=int, help='give up after this many time steps (default n_max)')
+    parser.add_argument('-o', '--output', help='save the phasors to this .npz file')
+    args = parser.parse_args(argv)
+
+    sc     = scenario(args.scenario)
+    result = run_steady(sc.simulation, tolerance=args.tolerance, periods=args.periods, max_steps=args.max_steps)
+    print('{}: {} after {} of {} time steps'.format(
+        args.scenario, 'steady' if result.converged else 'not steady', result.n, sc.n_max))
+    if args.output:
+        result.save(args.output)
+
+
+if __name__ == '__main__':
+    main()
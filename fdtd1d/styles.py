@@ -0,0 +1,55 @@
+# Figure layout of each script's animation
+# Shared by the matplotlib (animation) and NumPy (raster) renderers
+
+
+class Style:
+    """Figure layout of one script.
+
+    panels      ('Ex',) for one axes, ('Ex', 'Hz') for the two subplots
+                of FDTD-1D-1a to 1c
+    every       capture a frame every `every` time steps
+    time_text   position of the 'T = n' label
+    labels      extra static labels as (x, y, text)
+    centre      also centre the labels vertically
+    """
+
+    def __init__(self, figsize=(8, 1.75), every=5, panels=('Ex',), xmax=200,
+                 yticks=(-2.0, 2.2, 1.0), ylim=(-2.2, 2.2), time_text=(100, 0.5),
+                 labels=(), centre=False):
+        self.figsize   = figsize
+        self.every     = every
+        self.panels    = panels
+        self.xmax      = xmax
+        self.yticks    = yticks
+        self.ylim      = ylim
+        self.time_text = time_text
+        self.labels    = list(labels)
+        self.centre    = centre
+
+
+def style(sc):
+    """The Style used by the script of Scenario sc."""
+    name = sc.name
+    if name in ('1a-ii', '1a-iv'):
+        return Style((8, 3.5), 10 if name == '1a-ii' else 5, ('Ex', 'Hz'), yticks=(-1, 2.2, 1), ylim=(-2.2, 2.2))
+    if name[:2] in ('1a', '1b') or name == '1c-i':
+        return Style((8, 3.5), 5, ('Ex', 'Hz'), yticks=(-1, 1.2, 1), ylim=(-1.2, 1.2))
+    if name == '1c-ii':
+        return Style(yticks=(-0.0, 1.2, 0.5), ylim=(-0.2, 1.2))
+    if name in ('1d-i', '1d-ii'):
+        return Style(every=10, yticks=(-0.5, 1.2, 0.5), ylim=(-0.7, 1.2))
+    if name == '1d-iii':
+        return Style(every=10, yticks=(-0.7, 1.2, 0.5), ylim=(-0.7, 1.2))
+    if name[:2] == '1e':
+        return Style(xmax=sc.simulation.k_max, yticks=(-1.5, 1.2, 0.5), ylim=(-1.2, 1.4))
+    if name[:2] == '1f':
+        return Style((8, 3.5), yticks=(-2.0, 2.2, 0.5), time_text=(sc.simulation.k_max - 20, 1.5), centre=True)
+
+    # FDTD-1D-1g and Flux notation: lossy material with eps_r and sigma labels
+    k_max   = sc.simulation.k_max
+    eps_r   = sc.parameters['eps_r']
+    sigma   = sc.parameters['sigma']
+    s_label = '{:.2E}'.format(sigma) if name in ('1g-iii', '1g-iv') else '{}'.format(sigma)
+    return Style(time_text=(k_max - 20, -4.5), centre=True,
+                 labels=[(k_max - 20, 0.75, '$\\epsilon_r$ = {}'.format(eps_r)),
+                         (k_max - 20, -0.75, '$\\sigma$ = {}'.format(s_label))])
@@ -0,0 +1,162 @@
+# Parameter sweeps over the lossy slab set-up (FDTD-1D-1e, 1f, 1g families)
+# Runs are spread over a process pool, largest first, and streamed back
+#
+# Command line:
+#   python -m fdtd1d.sweep --freq 1e9 1.3e9 1.6e9 1.9e9 --eps-r 4 --sigma 0 0.04 -o sweep.npz
+
+# Imports
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from .prefix import run_shared
+from .scenarios import lossy
+from .stability import Unstable, Watchdog
+
+# Sweepable parameters and their defaults (FDTD-1D-2-1)
+DEFAULTS = dict(freq=700e6, eps_r=4, sigma=0.04, length=None, dy=None, k_max=200, n_max=800)
+
+
+def grid(**values):
+    """Every combination of the given parameter values.
+
+    Each keyword takes a value or a list of values; missing parameters use
+    DEFAULTS. Returns a list of parameter dicts.
+    """
+    unknown = set(values) - set(DEFAULTS)
+    if unknown:
+        raise TypeError('unknown sweep parameter(s): {}'.format(', '.join(sorted(unknown))))
+    axes = {}
+    for name, default in DEFAULTS.items():
+        value = values.get(name, default)
+        axes[name] = list(value) if isinstance(value, (list, tuple, np.ndarray)) else [value]
+    return [dict(zip(axes, combination)) for combination in itertools.product(*axes.values())]
+
+
+def cost(point):
+    # Work estimate used to schedule the largest runs first
+    return point['k_max']*point['n_max']
+
+
+def _simulation(point, flux):
+    return lossy('sweep', point['freq'], dy=point['dy'], eps_r=point['eps_r'],
+                 sigma=point['sigma'], n_max=point['n_max'], length=point['length'],
+                 flux=flux, k_max=point['k_max']).simulation
+
+
+def run_point(point, flux=False):
+    """Run one sweep point and return (point, Ex, Hz).
+
+    A point that violates the Courant limit or diverges is stopped by a
+    Watchdog and returns fields full of NaN.
+    """
+    sim = _simulation(point, flux)
+    try:
+        sim.run(watchdog=Watchdog())
+    except Unstable:
+        return point, np.full(sim.k_max, np.nan), np.full(sim.k_max, np.nan)
+    return point, sim.Ex, sim.Hz
+
+
+def run_group(points, flux=False):
+    """Run points that share a source set-up together (fdtd1d.prefix.run_shared).
+
+    Returns a list of (point, Ex, Hz). The steps before the wave reaches
+    the first cell where the points differ are only computed once. If any
+    point is unstable, the group falls back to run_point for each point.
+    """
+    try:
+        simulations = run_shared([_simulation(point, flux) for point in points], watchdog=Watchdog())
+    except Unstable:
+        return [run_point(point, flux) for point in points]
+    return [(point, sim.Ex, sim.Hz) for point, sim in zip(points, simulations)]
+
+
+def _groups(points):
+    # Points with the same frequency, cell size and grid share their source
+    # and differ only in the slab, downstream of it
+    groups = {}
+    for point in points:
+        groups.setdefault((point['freq'], point['dy'], point['k_max']), []).append(point)
+    return list(groups.values())
+
+
+def sweep(points, workers=None, flux=False, share=False):
+    """Run every point on a process pool and yield (point, Ex, Hz) as runs finish.
+
+    Points are submitted in order of decreasing k_max*n_max, so idle
+    workers always pick up the largest remaining run and the short runs
+    fill in at the end. workers=1 runs in this process.
+
+    share=True runs points that only differ in the slab (eps_r, sigma,
+    length, n_max) as one group per task, forking each from their common
+    prefix; pass an explicit dy so the cell size does not depend on eps_r.
+    """
+    if share:
+        tasks = [(run_group, group) for group in _groups(points)]
+        tasks.sort(key=lambda task: sum(cost(point) for point in task[1]), reverse=True)
+    else:
+        tasks = [(run_point, point) for point in sorted(points, key=cost, reverse=True)]
+    if workers == 1:
+        for function, argument in tasks:
+            yield from _results(function, function(argument, flux))
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(function, argument, flux): function for function, argument in tasks}
+        for future in as_completed(futures):
+            yield from _results(futures[future], future.result())
+
+
+def _results(function, result):
+    # run_group returns a list of results, run_point a single one
+    return result if function is run_group else [result]
+
+
+def _values(text):
+    # 'none' selects the default (whole half-domain / lambda_min/10)
+    return None if text.lower() == 'none' else float(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fdtd1d.sweep',
+                                     description='Sweep the lossy slab FDTD-1D set-up over a parameter grid.')
+    parser.add_argument('--freq', type=float, nargs='+', default=[DEFAULTS['freq']], help='source frequency [Hz]')
+    parser.add_argument('--eps-r', type=float, nargs='+', default=[DEFAULTS['eps_r']], help='relative permittivity')
+    parser.add_argument('--sigma', type=float, nargs='+', default=[DEFAULTS['sigma']], help='conductivity [S/m]')
+    parser.add_argument('--length', type=_values, nargs='+', default=[None], help='material length in cells')
+    parser.add_argument('--dy', type=_values, nargs='+', default=[None], help='cell size [m]')
+    parser.add_argument('--k-max', type=int, nargs='+', default=[DEFAULTS['k_max']], help='number of cells')
+    parser.add_argument('--n-max', type=int, nargs='+', default=[DEFAULTS['n_max']], help='number of time steps')
+    parser.add_argument('--flux', action='store_true', help='use the flux notation update')
+    parser.add_argument('--share-prefix', action='store_true',
+                        help='run points differing only in the slab from a shared prefix')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('-o', '--output', help='save all runs to this .npz file')
+    args = parser.parse_args(argv)
+
+    lengths = [None if length is None else int(length) for length in args.length]
+    points  = grid(freq=args.freq, eps_r=args.eps_r, sigma=args.sigma, length=lengths,
+                   dy=args.dy, k_max=args.k_max, n_max=args.n_max)
+    results = []
+    for i, (point, Ex, Hz) in enumerate(sweep(points, args.workers, args.flux, args.share_prefix), 1):
+        print('[{}/{}] {}  max|Ex| = {:.4f}'.format(
+            i, len(points), ' '.join('{}={}'.format(k, v) for k, v in point.items()), np.abs(Ex).max())
+            + ('' if np.isfinite(Ex).all() else ' (unstable)'),
+            flush=True)
+        results.append((point, Ex, Hz))
+
+    if args.output:
+        arrays = {}
+        for i, (point, Ex, Hz) in enumerate(results):
+            arrays['Ex_{}'.format(i)] = Ex
+            arrays['Hz_{}'.format(i)] = Hz
+            for name, value in point.items():
+                arrays['{}_{}'.format(name, i)] = np.nan if value is None else value
+        np.savez(args.output, **arrays)
+
+
+if __name__ == '__main__':
+    main()
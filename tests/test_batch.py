@@ -0,0 +1,57 @@
+# Batched ensembles against separate runs of each member
+
+# Imports
+import numpy as np
+import pytest
+
+from fdtd1d import SCENARIOS, scenario
+from fdtd1d.batch import Batch
+from fdtd1d.simulation import Simulation
+from fdtd1d.sources import GaussianPulse, SineWave, Source
+
+
+def _groups():
+    # Scenarios that can share a Batch and run for the same n_max
+    groups = {}
+    for name in SCENARIOS:
+        sim = scenario(name).simulation
+        groups.setdefault((sim.k_max, sim.n_max, sim.flux), []).append(name)
+    return list(groups.values())
+
+
+def _assert_rows(batch, sims):
+    for row, sim in enumerate(sims):
+        # 1b-ii blows up to NaN, at the same cells in both
+        assert np.array_equal(batch.Ex[row], sim.Ex, equal_nan=True)
+        assert np.array_equal(batch.Hz[row], sim.Hz, equal_nan=True)
+        assert np.array_equal(batch.Dx[row], sim.Dx, equal_nan=True)
+
+
+@pytest.mark.parametrize('names', _groups(), ids=lambda names: ','.join(names))
+def test_scenarios(names):
+    batch = Batch([scenario(name).simulation for name in names]).run()
+    _assert_rows(batch, [scenario(name).simulation.run(jit=False) for name in names])
+
+
+def _switched(end):
+    # A CW source switched off at step `end` next to an ordinary soft pulse
+    sine = SineWave(1e9, 1e-11)
+    sine.end = end
+    sources = [Source(50, sine), Source(120, GaussianPulse())]
+    return Simulation(200, 400, sources=sources)
+
+
+def test_switched_off_source():
+    ends  = [None, 100, 250]
+    batch = Batch([_switched(end) for end in ends]).run()
+    _assert_rows(batch, [_switched(end).run(jit=False) for end in ends])
+
+
+def test_overridden_active():
+    class Window(Source):
+        def active(self, n):
+            return 100 <= n < 200
+
+    sim = Simulation(200, 400, sources=[Window(50, GaussianPulse())])
+    with pytest.raises(ValueError, match='Window'):
+        Batch([sim])
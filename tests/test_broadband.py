@@ -0,0 +1,30 @@
+# Broadband runs against the scenario they start from
+
+# Imports
+import numpy as np
+import pytest
+
+from fdtd1d.broadband import MAX_ROUND_TRIPS, broadband, pulse
+from fdtd1d.scenarios import scenario
+
+FREQS = np.array([1e9, 1.3e9, 1.6e9, 1.9e9])
+
+
+@pytest.mark.parametrize('name', ['1e-iii', '1g-i'])
+def test_scenario_untouched(name):
+    sc      = scenario(name)
+    sim     = sc.simulation
+    source  = sim.sources[0]
+    before  = (sim.n_max, source.waveform, list(sim.monitors), sim.n)
+    broadband(sc, FREQS, jit=False)
+    assert (sim.n_max, source.waveform, list(sim.monitors), sim.n) == before
+    assert not np.any(sim.Ex)
+
+
+@pytest.mark.parametrize('name', ['1e-iii', '1g-i'])
+def test_decay_matches_full_length(name):
+    early = broadband(scenario(name), FREQS, jit=False)
+    n_steps = pulse(FREQS, early.dt).end + MAX_ROUND_TRIPS*2*scenario(name).simulation.k_max
+    full  = broadband(scenario(name), FREQS, n_steps=n_steps, jit=False)
+    scale = np.abs(full.response).max()
+    assert np.abs(early.response - full.response).max() < 1e-3*scale
@@ -0,0 +1,74 @@
+# Checkpoint/restart: an interrupted and resumed run against an uninterrupted one
+
+# Imports
+import os
+
+import numpy as np
+import pytest
+
+from fdtd1d import checkpoint, jit
+from fdtd1d.boundaries import AbsorbingBoundary
+from fdtd1d.monitors import DFTMonitor
+from fdtd1d.scenarios import scenario
+
+
+def _build(name):
+    sim = scenario(name).simulation
+    sim.boundaries[0] = AbsorbingBoundary('lower', trace_every=7)
+    fields = ('Ex', 'Hz', 'Dx') if sim.flux else ('Ex', 'Hz')
+    sim.monitors.append(DFTMonitor([3, 60, 150], [5e8, 7e8, 9e8], 1e-11, fields=fields))
+    sim.reset()
+    return sim
+
+
+@pytest.mark.parametrize('name', ['1e-ii', '2-3'])
+@pytest.mark.parametrize('compiled', [False, pytest.param(True, marks=pytest.mark.skipif(
+    not jit.HAVE_NUMBA, reason='needs numba'))])
+def test_resume(tmp_path, monkeypatch, name, compiled):
+    path  = str(tmp_path / 'run.npz')
+    saved = []
+    save  = checkpoint.save
+    monkeypatch.setattr(checkpoint, 'save', lambda sim, path: saved.append(sim.n) or save(sim, path))
+
+    reference = _build(name).run(jit=compiled)
+    _build(name).run(250, jit=compiled, checkpoint=path, checkpoint_every=100)
+    assert saved == [100, 200, 250]
+    resumed = checkpoint.resume(_build(name), path)
+    assert resumed.n == 250
+    resumed.run(jit=compiled)
+
+    for field in ('Ex', 'Hz', 'Dx', 'ix'):
+        assert np.array_equal(getattr(reference, field), getattr(resumed, field)), field
+    for field in reference.monitors[0].fields:
+        assert np.array_equal(reference.monitors[0].spectrum(field), resumed.monitors[0].spectrum(field)), field
+    assert np.array_equal(reference.boundaries[0].trace, resumed.boundaries[0].trace)
+
+
+def test_run_needs_path():
+    with pytest.raises(ValueError):
+        scenario('1a-i').simulation.run(10, checkpoint_every=5)
+
+
+def test_replace_is_atomic(tmp_path, monkeypatch):
+    path = str(tmp_path / 'run.npz')
+    sim  = scenario('2-2').simulation.run(100)
+    checkpoint.save(sim, path)
+
+    # A complete write replaces the existing file
+    sim.run(50)
+    checkpoint.save(sim, path)
+    with np.load(path) as arrays:
+        assert int(arrays['n']) == 150 and np.array_equal(arrays['Ex'], sim.Ex)
+
+    # A write that fails part way leaves it as it was, with no temporary file
+    def broken(f, **arrays):
+        f.write(b'partial')
+        raise OSError('disk full')
+    monkeypatch.setattr(checkpoint.np, 'savez', broken)
+    sim.run(50)
+    with pytest.raises(OSError):
+        checkpoint.save(sim, path)
+    assert os.listdir(str(tmp_path)) == ['run.npz']
+    monkeypatch.undo()
+    with np.load(path) as arrays:
+        assert int(arrays['n']) == 150
@@ -0,0 +1,40 @@
+# CPML reflection against a domain large enough to have none
+
+# Imports
+import numpy as np
+import pytest
+
+from fdtd1d import CPML, GaussianPulse, Simulation, Source
+
+K_MAX  = 200
+PAD    = 1500
+PROBE  = 60
+# A short pulse, so that wavelengths of a few cells reach the layers too,
+# starting smoothly (an abrupt start leaves a standing pattern at the
+# source that no boundary reproduces)
+SPREAD = 3
+
+
+def _run(courant, eps_r, flux, boundaries, pad):
+    # Ex on the cells [PROBE, K_MAX - PROBE) around a soft Gaussian source
+    # in the middle, at every step
+    k_max = K_MAX + 2*pad
+    if flux:
+        coefficients = dict(const_b=np.full(k_max, 1/eps_r))
+    else:
+        coefficients = dict(cb=np.full(k_max, courant/eps_r))
+    source = Source(pad + K_MAX//2, GaussianPulse(spread=SPREAD, t_0=6*SPREAD))
+    sim = Simulation(k_max, 1000, courant=courant, sources=[source], boundaries=boundaries, **coefficients)
+    fields = []
+    sim.run(callback=lambda sim, n: fields.append(sim.Ex[pad+PROBE:pad+K_MAX-PROBE].copy()), every=1, jit=False)
+    return np.array(fields)
+
+
+@pytest.mark.parametrize('flux', [False, True])
+@pytest.mark.parametrize('eps_r', [1, 4])
+@pytest.mark.parametrize('courant', [1.0, 0.99, 0.5])
+def test_reflection(courant, eps_r, flux):
+    reference = _run(courant, eps_r, flux, [], PAD)
+    layered   = _run(courant, eps_r, flux, [CPML('lower'), CPML('upper')], 0)
+    reflection = np.abs(layered - reference).max()/np.abs(reference).max()
+    assert 20*np.log10(reflection) < -60
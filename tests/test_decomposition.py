@@ -0,0 +1,48 @@
+# run_decomposed against the single-process NumPy step
+
+# Imports
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from fdtd1d import jit
+from fdtd1d.decomposition import run_decomposed
+from fdtd1d.scenarios import lossy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Threaded kernel first, then the worker processes, in a fresh interpreter
+AFTER_THREADS = '''
+import numpy as np
+from fdtd1d import jit
+from fdtd1d.decomposition import run_decomposed
+from fdtd1d.scenarios import lossy
+jit.MIN_CHUNK = 16
+threaded = lossy('threaded', 700e6, k_max=2000, n_max=200).simulation
+jit.advance(threaded, 200, 'threaded')
+decomposed = run_decomposed(lossy('decomposed', 700e6, k_max=2000, n_max=200).simulation, workers=3, min_cells=64)
+reference  = lossy('reference', 700e6, k_max=2000, n_max=200).simulation.run(jit=False)
+assert np.array_equal(threaded.Ex, reference.Ex) and np.array_equal(decomposed.Ex, reference.Ex)
+'''
+
+
+@pytest.mark.parametrize('flux', [False, True])
+def test_matches_single_process(flux):
+    reference  = lossy('reference', 700e6, k_max=3000, n_max=600, flux=flux, pec=10).simulation.run(jit=False)
+    decomposed = run_decomposed(lossy('decomposed', 700e6, k_max=3000, n_max=600, flux=flux, pec=10).simulation,
+                                workers=3, min_cells=64)
+    for name in ('Ex', 'Hz', 'Dx', 'ix'):
+        assert np.array_equal(getattr(reference, name), getattr(decomposed, name)), name
+
+
+@pytest.mark.skipif(not jit.HAVE_NUMBA, reason='needs numba')
+def test_exits_after_threaded_kernel():
+    # Forked workers used to inherit the threaded kernel's thread pool and
+    # hang the interpreter at exit
+    env = dict(os.environ, NUMBA_NUM_THREADS='4', PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-c', AFTER_THREADS], env=env, timeout=120,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,36 @@
+# The in-place NumPy step against the slice expressions of the scripts
+# (fdtd1d.bench.expression_step), bit for bit
+
+# Imports
+import numpy as np
+import pytest
+
+from fdtd1d.bench import FIELDS, expression_step
+from fdtd1d.scenarios import SCENARIOS, lossy, scenario
+
+
+def _assert_identical(reference, sim):
+    for name in FIELDS:
+        assert np.array_equal(getattr(reference, name), getattr(sim, name)), name
+
+
+@pytest.mark.parametrize('name', SCENARIOS)
+def test_scenario(name):
+    reference = scenario(name).simulation
+    sim       = scenario(name).simulation
+    for _ in range(reference.n_max):
+        expression_step(reference)
+        sim.step()
+    _assert_identical(reference, sim)
+
+
+@pytest.mark.parametrize('flux', [False, True])
+def test_segmented_slab(flux):
+    # Long enough for the per-segment update (segments of at least 256 cells)
+    reference = lossy('slab', 700e6, k_max=2000, n_max=1500, flux=flux).simulation
+    sim       = lossy('slab', 700e6, k_max=2000, n_max=1500, flux=flux).simulation
+    assert sim._segments is not None
+    for _ in range(reference.n_max):
+        expression_step(reference)
+        sim.step()
+    _assert_identical(reference, sim)
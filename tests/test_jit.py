@@ -0,0 +1,81 @@
+# The compiled kernels against each other and the NumPy step, bit for bit
+
+# Imports
+import numpy as np
+import pytest
+
+from fdtd1d import jit
+from fdtd1d.monitors import DFTMonitor
+from fdtd1d.scenarios import lossy, scenario
+from fdtd1d.sources import GaussianPulse, Source
+
+pytestmark = pytest.mark.skipif(not jit.HAVE_NUMBA, reason='needs numba')
+
+FIELDS = ('Ex', 'Hz', 'Dx', 'ix')
+
+
+def _edges(sim):
+    # Sources and monitor cells at both grid edges, where a kernel's first
+    # and last cells (or chunks, or tiles) meet the boundaries
+    k_max = sim.k_max
+    sim.sources += [Source(0, GaussianPulse()), Source(k_max - 1, GaussianPulse(), field='Hz'),
+                    Source(k_max - 2, GaussianPulse(spread=20), field='Hz', hard=True)]
+    fields = ('Ex', 'Hz', 'Dx') if sim.flux else ('Ex', 'Hz')
+    sim.monitors.append(DFTMonitor([0, 1, 2, k_max // 2, k_max - 2, k_max - 1], [3e8, 7e8], 1e-11, fields=fields))
+    sim.reset()
+    return sim
+
+
+def _assert_identical(a, b):
+    for name in FIELDS:
+        assert np.array_equal(getattr(a, name), getattr(b, name)), name
+    for x, y in zip(a.monitors, b.monitors):
+        for field in x.fields:
+            assert np.array_equal(x.spectrum(field), y.spectrum(field)), field
+    for x, y in zip(a.boundaries, b.boundaries):
+        if hasattr(x, 'ring'):
+            assert np.array_equal(x.ring, y.ring)
+
+
+def _run(sim, kernel, steps=(97, 211, 400)):
+    # Uneven calls, so runs do not start on a block or tile edge
+    for n in steps:
+        jit.advance(sim, n - sim.n, kernel)
+    return sim
+
+
+@pytest.mark.parametrize('track', [False, True])
+@pytest.mark.parametrize('flux', [False, True])
+def test_threaded_chunks(monkeypatch, flux, track):
+    # Several chunks whatever the number of threads, so the chunk seams run
+    monkeypatch.setattr(jit, 'chunks', lambda k_max, threads=None: 7)
+    builds = []
+    for _ in range(2):
+        sim = lossy('jit', 700e6, k_max=997, n_max=400, flux=flux, pec=40).simulation
+        sim.track = track
+        builds.append(_edges(sim))
+    serial, threaded = _run(builds[0], 'serial'), _run(builds[1], 'threaded')
+    _assert_identical(serial, threaded)
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+@pytest.mark.parametrize('name', ['1a-iv', '1c-i', '1d-ii', '1e-vii', '1g-iv', '2-2', '2-3'])
+def test_tiled(monkeypatch, name, dtype):
+    # Tiles of 13 cells advanced 5 steps at a time: many tiles, and neither
+    # the grids nor the run lengths are multiples of the tile
+    monkeypatch.setattr(jit, 'TILE_CELLS', 13)
+    monkeypatch.setattr(jit, 'TILE_STEPS', 5)
+    serial = _run(_edges(scenario(name, dtype=dtype).simulation), 'serial')
+    tiled  = _run(_edges(scenario(name, dtype=dtype).simulation), 'tiled')
+    _assert_identical(serial, tiled)
+
+
+@pytest.mark.parametrize('flux', [False, True])
+def test_tiled_automatic(flux):
+    # Large grids pick the tiled kernel by themselves
+    reference = lossy('jit', 700e6, k_max=jit.TILE_MIN + 123, n_max=150, flux=flux).simulation.run(jit=False)
+    sim       = lossy('jit', 700e6, k_max=jit.TILE_MIN + 123, n_max=150, flux=flux).simulation
+    assert jit.tiled(sim) and jit.chunks(sim.k_max) == 1
+    sim.run(jit=True)
+    for name in FIELDS:
+        assert np.array_equal(getattr(reference, name), getattr(sim, name)), name
@@ -0,0 +1,37 @@
+# Shared-prefix runs against separate runs of each variant
+
+# Imports
+import numpy as np
+import pytest
+
+from fdtd1d.boundaries import AbsorbingBoundary
+from fdtd1d.prefix import run_shared, shared_steps
+from fdtd1d.scenarios import scenario
+
+
+def _build(name, n_max):
+    # Variant with a traced lower boundary, whose trace length follows n_max
+    sim = scenario(name).simulation
+    sim.n_max = n_max
+    sim.boundaries[0] = AbsorbingBoundary('lower', trace_every=3)
+    sim.reset()
+    return sim
+
+
+@pytest.mark.parametrize('variants', [
+    [('1e-i', 800), ('1e-ii', 1200), ('1e-ii', 500)],
+    [('1e-ii', 300), ('1e-i', 900), ('1e-ii', 800)],
+])
+def test_mixed_n_max(variants):
+    shared = [_build(name, n_max) for name, n_max in variants]
+    assert shared_steps(shared) > 0
+    run_shared(shared, jit=False)
+    for (name, n_max), sim in zip(variants, shared):
+        alone = _build(name, n_max).run(jit=False)
+        assert sim.n == n_max
+        for field in ('Ex', 'Hz'):
+            assert np.array_equal(getattr(alone, field), getattr(sim, field)), field
+        for ours, theirs in zip(alone.boundaries, sim.boundaries):
+            assert np.array_equal(ours.ring, theirs.ring)
+            if ours.trace is not None:
+                assert np.array_equal(ours.trace, theirs.trace)